@@ -1,308 +1,248 @@
-import streamlit as st
+from datetime import date
+
+import numpy as np
 import pandas as pd
-import re
+import streamlit as st
 
-# ================== URLs dos CSVs no GitHub ==================
-URL_COMPRAS = "https://raw.githubusercontent.com/K1NGOD-RJ/projeto_orcamento/main/compradepapel.csv"
-URL_USO_PAPEL_MIOLO = "https://raw.githubusercontent.com/K1NGOD-RJ/projeto_orcamento/main/usodepapelmiolos.csv"
-URL_USO_PAPEL_BOLSA = "https://raw.githubusercontent.com/K1NGOD-RJ/projeto_orcamento/main/usodepapelbolsa.csv"
-URL_USO_PAPEL_DIVISORIA = "https://raw.githubusercontent.com/K1NGOD-RJ/projeto_orcamento/main/usodepapeldivisoria.csv"
-URL_USO_PAPEL_ADESIVO = "https://raw.githubusercontent.com/K1NGOD-RJ/projeto_orcamento/main/usodepapeladesivo.csv"
-URL_COMPRA_DIRETA = "https://raw.githubusercontent.com/K1NGOD-RJ/projeto_orcamento/main/compradireta.csv"
-URL_TABELA_WIREO = "https://raw.githubusercontent.com/K1NGOD-RJ/projeto_orcamento/main/tabelawireo.csv"
+from custos import PERSONALIZADO, PREFIXO_CD
+from fontes import CarregadorFontes
+from instrumentacao import REGISTRO, contar, cronometrar, encerrar_perfil, iniciar_perfil
+from modelo import montar_dados
+from orcamentos import ABERTO, ArmazemOrcamentos
+from precos import MEDIA_PONDERADA, ULTIMO, funcoes_de_preco
+from snapshot import Snapshot
 
 # ================== CONFIGURAÇÃO DA PÁGINA ==================
 st.set_page_config(page_title="📦 Cálculo de Custo de Produto", layout="centered")
 st.title("📐 Análise de Custo: Miolo + Bolsa + Divisória + Adesivo + Compras Diretas")
 
+# ================== DEPURAÇÃO (OPCIONAL) ==================
+# Painel lateral só nas sessões abertas com `?depurar=1` na URL. O registro é do
+# processo: ligar a instrumentação aqui vale para todas as sessões até desligar, então
+# o toggle mostra o estado atual do registro e só o altera quando é clicado.
+def alternar_instrumentacao():
+    REGISTRO.ativo = st.session_state['instrumentacao']
+
+depuracao = st.query_params.get("depurar") == "1"
+perfil = None
+if depuracao:
+    st.session_state['instrumentacao'] = REGISTRO.ativo
+    st.sidebar.toggle("Instrumentação ligada", key="instrumentacao", on_change=alternar_instrumentacao)
+    if st.session_state.pop('perfilar_proxima', False):
+        perfil = iniciar_perfil()
+secoes = REGISTRO.secoes('rerun')
+secoes.marcar('carregar_dados')
+
 # ================== FUNÇÕES AUXILIARES ==================
-@st.cache_data
+def inicial(chave, valor):
+    # Valor inicial de um widget semeado no session_state em vez de `value=`: o
+    # carregamento de um orçamento salvo escreve nessas chaves (ver carregar_orcamento)
+    st.session_state.setdefault(chave, valor)
+    return chave
+
+@st.cache_resource
+def obter_carregador():
+    # Um carregador por processo: cada fonte tem seu próprio cache/TTL e é
+    # revalidada com GET condicional; as vencidas são baixadas em paralelo.
+    # O snapshot Arrow em disco deixa o cold start sem re-parsear os CSVs.
+    return CarregadorFontes(snapshot=Snapshot())
+
+@st.cache_resource(max_entries=4)
+def obter_dados(versoes, _valores):
+    # Reconstruído só quando alguma fonte muda (`versoes` = hashes das fontes) e
+    # compartilhado por referência entre sessões: DadosOrcamento é só para leitura
+    contar('cache.obter_dados.misses')
+    return montar_dados(_valores, versoes)
+
 def carregar_dados():
-    try:
-        # --- 1. Carregar compras de papel ---
-        df_compras = pd.read_csv(URL_COMPRAS, encoding='utf-8')
-        df_compras.columns = [
-            'Demanda', 'Quantidade', 'DataSolicitacao', 'PrazoDesejado', 'DataAprovacao',
-            'DataEmissaoNF', 'PrevisaoEntrega', 'NumeroNF', 'Fornecedor', 'ValorTotal',
-            'ValorFrete', 'CreditoICMS', 'CNPJ', 'FormaPagamento', 'Parcelas', 'ValorUnitarioStr'
-        ]
-
-        # Converter datas
-        date_cols = ['DataSolicitacao', 'PrazoDesejado', 'DataAprovacao', 'DataEmissaoNF', 'PrevisaoEntrega']
-        for col in date_cols:
-            df_compras[col] = pd.to_datetime(df_compras[col], format='%d/%m/%Y', errors='coerce')
-
-        # Converter valor unitário
-        df_compras['ValorUnitario'] = (df_compras['ValorUnitarioStr']
-                                       .astype(str)
-                                       .str.replace('R\\$', '', regex=True)
-                                       .str.replace(',', '.')
-                                       .str.strip())
-        df_compras['ValorUnitario'] = pd.to_numeric(df_compras['ValorUnitario'], errors='coerce')
-
-        # Limpar nome do papel
-        def limpar_papel(nome):
-            if pd.isna(nome):
-                return ""
-            nome = re.sub(r'^(MP\d{3}|COUCHE|CARTAO|PAPEL|20\d{3}|COLOR|SCRITURA|Papel|Cartão)\s*', '', str(nome), flags=re.IGNORECASE)
-            nome = re.sub(r'\s*UNICA-\w+', '', nome)
-            nome = re.sub(r'\s*-\s*SEM\s*LINER', '', nome, flags=re.IGNORECASE)
-            nome = re.sub(r'\s*-\s*CHAMBRIL', '', nome, flags=re.IGNORECASE)
-            nome = re.sub(r'\s+', ' ', nome).strip()
-            return nome.title()
-
-        df_compras['PapelLimpo'] = df_compras['Demanda'].apply(limpar_papel)
-        df_compras = df_compras.dropna(subset=['ValorUnitario', 'PapelLimpo'])
-        df_compras = df_compras[df_compras['PapelLimpo'] != ""]
-        df_compras = df_compras.sort_values('DataEmissaoNF', ascending=False)
-        papeis_unicos = sorted(df_compras['PapelLimpo'].dropna().unique())
-
-        # --- 2. Carregar uso de papel por miolo, bolsa, divisória, adesivo ---
-        def carregar_componente(url, colunas):
-            df = pd.read_csv(url, encoding='utf-8')
-            df.columns = colunas
-            df['QuantidadePapel'] = pd.to_numeric(df['QuantidadePapel'], errors='coerce')
-            df['ValorImpressao'] = pd.to_numeric(df['ValorImpressao'], errors='coerce')
-            df['UnitImpressao'] = pd.to_numeric(df['UnitImpressao'], errors='coerce')
-            df['QuantidadeAprovada'] = pd.to_numeric(df['QuantidadeAprovada'], errors='coerce')
-            df['Papel'] = df['Papel'].apply(limpar_papel)
-            return df
-
-        df_miolos = carregar_componente(URL_USO_PAPEL_MIOLO, ['Miolo', 'Papel', 'QuantidadePapel', 'ValorImpressao', 'UnitImpressao', 'QuantidadeAprovada'])
-        df_bolsas = carregar_componente(URL_USO_PAPEL_BOLSA, ['Bolsa', 'Papel', 'QuantidadePapel', 'ValorImpressao', 'UnitImpressao', 'QuantidadeAprovada'])
-        df_divisorias = carregar_componente(URL_USO_PAPEL_DIVISORIA, ['Divisoria', 'Papel', 'QuantidadePapel', 'ValorImpressao', 'UnitImpressao', 'QuantidadeAprovada'])
-        df_adesivos = carregar_componente(URL_USO_PAPEL_ADESIVO, ['Adesivo', 'Papel', 'QuantidadePapel', 'ValorImpressao', 'UnitImpressao', 'QuantidadeAprovada'])
-
-        # --- 3. Carregar compras diretas ---
-        df_cd = pd.read_csv(URL_COMPRA_DIRETA, encoding='utf-8')
-        if 'CATEGORIA_MATERIAL_PCP' not in df_cd.columns:
-            st.error("❌ Coluna 'CATEGORIA_MATERIAL_PCP' não encontrada.")
-            return None
-
-        df_cd = df_cd.dropna(subset=['CATEGORIA_MATERIAL_PCP', 'VALOR_UNITARIO'])
-        df_cd['VALOR_UNITARIO'] = pd.to_numeric(df_cd['VALOR_UNITARIO'], errors='coerce')
-        df_cd = df_cd.dropna(subset=['VALOR_UNITARIO'])
-
-        # Extrair nome limpo
-        df_cd['NomeLimpo'] = df_cd['DEMANDA'].apply(lambda x: re.sub(r'^MP\d{3}\s*', '', str(x)))
-        df_cd['NomeLimpo'] = df_cd['NomeLimpo'].apply(lambda x: re.sub(r'\s*UNICA-[A-Z0-9\-]+', '', str(x)))
-        df_cd['NomeLimpo'] = df_cd['NomeLimpo'].str.strip()
-
-        # Agrupar por categoria
-        categorias_cd = {}
-        for cat in df_cd['CATEGORIA_MATERIAL_PCP'].dropna().unique():
-            itens = df_cd[df_cd['CATEGORIA_MATERIAL_PCP'] == cat]
-            categorias_cd[cat] = itens[['NomeLimpo', 'VALOR_UNITARIO']].drop_duplicates().to_dict('records')
-
-        # --- 4. Carregar tabela de WIRE-O ---
-        try:
-            df_wireo = pd.read_csv(URL_TABELA_WIREO, encoding='utf-8')
-            df_wireo.columns = ['WIREO', 'QUANTIDADE_POR_CAIXA']
-            df_wireo['WIREO'] = df_wireo['WIREO'].astype(str).str.strip()
-            mapeamento_wireo = dict(zip(df_wireo['WIREO'], df_wireo['QUANTIDADE_POR_CAIXA']))
-        except Exception:
-            st.warning("⚠️ Não foi possível carregar a tabela de WIRE-O. Assumindo 6000 anéis por caixa.")
-            mapeamento_wireo = {}
-
-        return (df_compras, papeis_unicos, df_miolos, df_bolsas, df_divisorias, 
-                df_adesivos, categorias_cd, mapeamento_wireo)
-
-    except Exception as e:
-        st.error(f"❌ Erro ao carregar os dados: {e}")
+    carregador = obter_carregador()
+    valores, erros, versoes = carregador.carregar()
+
+    if 'wireo' in erros:
+        st.warning("⚠️ Não foi possível carregar a tabela de WIRE-O. Assumindo 6000 anéis por caixa.")
+        valores['wireo'] = {}
+        del erros['wireo']
+    if erros:
+        for nome, e in erros.items():
+            st.error(f"❌ Erro ao carregar os dados ({nome}): {e}")
         return None
 
+    contar('cache.obter_dados.chamadas')
+    # Chave = hashes das entradas devolvidas junto com `valores`, não o cache atual do
+    # carregador (outra sessão pode ter atualizado uma fonte nesse meio-tempo)
+    return obter_dados(tuple(sorted(versoes.items())), valores)
+
+@st.cache_resource
+def obter_armazem():
+    # Orçamentos salvos em SQLite local (ORCAMENTO_BANCO), uma conexão por processo
+    return ArmazemOrcamentos()
+
 # ================== CARREGAR DADOS ==================
 dados = carregar_dados()
 if dados is None:
     st.stop()
 
-(df_compras, papeis_unicos, df_miolos, df_bolsas, df_divisorias, 
- df_adesivos, categorias_cd, mapeamento_wireo) = dados
+papeis_unicos = dados.papeis_unicos
+motor_papel, motor_cd, motor_custos = dados.motor_papel, dados.motor_cd, dados.motor_custos
+catalogo_cd = dados.catalogo_cd
 
 # ================== SELETOR DE QUANTIDADE (TOP) ==================
+secoes.marcar('entradas')
 st.markdown("### 📦 Quantidade do Orçamento")
 quantidade_orcamento = st.number_input(
     "Digite a quantidade total do orçamento:",
     min_value=1,
-    value=15000,
     step=1,
+    key=inicial("quantidade_orcamento", 15000),
     help="Essa quantidade será usada para dividir o valor do serviço no cálculo unitário"
 )
 st.divider()
 
-# ================== FUNÇÃO PARA CALCULAR CUSTO UNITÁRIO (papel + serviço) ==================
-def calcular_custo(nome_item, df_item, tipo="Item"):
-    linha = df_item[df_item[tipo] == nome_item].iloc[0]
-    papel_necessario = linha['Papel']
-    qtd_papel_total = linha['QuantidadePapel']
-    qtd_aprovada = linha['QuantidadeAprovada']
-    valor_impressao = linha['ValorImpressao']
+# ================== BASE DE PREÇO ==================
+METODOS_PRECO = {"Última compra": ULTIMO, "Média ponderada (volume)": MEDIA_PONDERADA}
 
-    if qtd_aprovada <= 0:
-        qtd_aprovada = 1
-
-    folhas_por_unidade = qtd_papel_total / qtd_aprovada
-    df_papel = df_compras[df_compras['PapelLimpo'] == papel_necessario]
-    if df_papel.empty:
-        st.warning(f"⚠️ Papel não encontrado: **{papel_necessario}**")
-        return None, None, None, None
-
-    preco_unitario_papel = df_papel.iloc[0]['ValorUnitario']
-    custo_papel_por_unidade = preco_unitario_papel * folhas_por_unidade
-    custo_servico_por_unidade = valor_impressao / quantidade_orcamento
-    custo_total_unitario = custo_papel_por_unidade + custo_servico_por_unidade
-
-    return custo_total_unitario, custo_papel_por_unidade, custo_servico_por_unidade, papel_necessario
-
-# ================== FUNÇÃO: CÁLCULO PERSONALIZADO (papel) ==================
-def calcular_personalizado(papel_selecionado, aproveitamento, valor_servico, quantidade_orcamento):
-    if aproveitamento <= 0:
-        aproveitamento = 1
-
-    df_papel = df_compras[df_compras['PapelLimpo'] == papel_selecionado]
-    if df_papel.empty:
-        st.error(f"❌ Papel não encontrado: **{papel_selecionado}**")
-        return None, None, None, None, None
-
-    preco_unitario_papel = df_papel.iloc[0]['ValorUnitario']
-    custo_papel_por_unidade = preco_unitario_papel / aproveitamento
-    custo_servico_por_unidade = valor_servico / quantidade_orcamento
-    custo_total = custo_papel_por_unidade + custo_servico_por_unidade
+st.markdown("### 🗓️ Base de Preço")
+col1, col2, col3 = st.columns(3)
+metodo_preco = METODOS_PRECO[col1.selectbox("Preço de referência", options=list(METODOS_PRECO), key="metodo_preco")]
+usar_data_preco = col2.checkbox("Preço em uma data", key=inicial("usar_data_preco", False))
+data_preco = col2.date_input("Data de referência", disabled=not usar_data_preco, key=inicial("data_preco", date.today()))
+custo_posto = col3.checkbox("Custo posto (+ frete − crédito ICMS)", key=inicial("custo_posto", False),
+                            help="Soma o frete e abate o crédito de ICMS, rateados pela quantidade da compra")
+st.divider()
 
-    return custo_total, custo_papel_por_unidade, custo_servico_por_unidade, papel_selecionado, ""
+versoes = dados.versoes
+base_preco = (metodo_preco, data_preco if usar_data_preco else None, custo_posto)
+
+# ================== MEMOIZAÇÃO ==================
+# O custo de cada bloco (componente ou categoria de compra direta) vem de um cache
+# chaveado pelas entradas do bloco, pela base de preço e pelas versões dos dados:
+# num rerun, só o bloco cujo widget mudou é recalculado; os demais são hits.
+@st.cache_resource(max_entries=4)
+def opcoes_da_interface(versoes, _motor_custos):
+    opcoes_componentes = {tipo: ["Personalizado"] + _motor_custos.opcoes(tipo) for tipo in _motor_custos.tabelas}
+    opcoes_cd = {categoria: ["Personalizado"] + list(_motor_custos.catalogo.itens(categoria))
+                 for categoria in _motor_custos.catalogo.categorias()}
+    return opcoes_componentes, opcoes_cd
+
+@st.cache_data(max_entries=1024)
+def custo_do_bloco(versoes, config_bloco, base_preco, _motor_custos, _motor_papel, _motor_cd):
+    contar('cache.custo_do_bloco.misses')
+    precos_papel, precos_cd = funcoes_de_preco(_motor_papel, _motor_cd, *base_preco)
+    return _motor_custos.orcar([config_bloco], precos_papel, precos_cd).iloc[0].to_dict()
+
+opcoes_componentes, opcoes_cd = opcoes_da_interface(versoes, motor_custos)
+
+# Resultado de cada bloco nesta execução: bloco -> (config do bloco, custos)
+blocos = {}
+
+def publicar_bloco(bloco, config_bloco):
+    resultado = None
+    if config_bloco is not None:
+        contar('cache.custo_do_bloco.chamadas')
+        resultado = custo_do_bloco(versoes, {'quantidade': quantidade_orcamento, **config_bloco},
+                                   base_preco, motor_custos, motor_papel, motor_cd)
+    blocos[bloco] = (config_bloco, resultado)
 
 # ================== COMPONENTES: MIÓLO, BOLSA, DIVISÓRIA, ADESIVO ==================
+# (tipo, rótulo, título do personalizado, checkbox, selectbox, chave, rótulo do papel,
+#  chave do aproveitamento, aproveitamento padrão, chave do serviço, serviço padrão)
+COMPONENTES_UI = [
+    ('Miolo', "Miolo", "Miolo Personalizado", "📘 Incluir Miolo?", "Miolo:", "miolo", "miolo", "aprov_miolo", 5.0, "serv_miolo", 13050.0),
+    ('Bolsa', "Bolsa", "Bolsa Personalizada", "👜 Incluir Bolsa?", "Bolsa:", "bolsa", "bolsa", "aprov_bolsa", 4.0, "serv_bolsa", 2425.0),
+    ('Divisoria', "Divisória", "Divisória Personalizada", "🔖 Incluir Divisória?", "Divisória:", "divisoria", "divisória", "aprov_div", 3.0, "serv_div", 22986.0),
+    ('Adesivo', "Adesivo", "Adesivo Personalizado", "🏷️ Incluir Adesivo?", "Adesivo:", "adesivo", "adesivo", "aprov_adesivo", 10.0, "serv_adesivo", 4840.0),
+]
+
+@cronometrar('bloco.componente')
+def bloco_componente(tipo, rotulo_checkbox, rotulo_selectbox, chave, rotulo_papel,
+                     chave_aprov, aprov_padrao, chave_serv, serv_padrao):
+    if not st.checkbox(rotulo_checkbox, key=inicial(f"inclui_{chave}", False)):
+        publicar_bloco(tipo, None)
+        return
+    selecionado = st.selectbox(rotulo_selectbox, options=opcoes_componentes[tipo], index=0, key=chave)
+    config_bloco = {tipo: selecionado}
+    if selecionado == "Personalizado":
+        col1, col2, col3 = st.columns(3)
+        config_bloco[f'{tipo}_papel'] = col1.selectbox(f"Papel utilizado ({rotulo_papel})", options=papeis_unicos, index=0, key=f"papel_{chave}")
+        config_bloco[f'{tipo}_aproveitamento'] = col2.number_input("Aproveitamento (unidades por folha)", min_value=0.1, step=0.1, key=inicial(chave_aprov, aprov_padrao))
+        config_bloco[f'{tipo}_valor_servico'] = col3.number_input("Valor total do serviço (impressão)", min_value=0.0, key=inicial(chave_serv, serv_padrao))
+    publicar_bloco(tipo, config_bloco)
+
+secoes.marcar('componentes')
 st.markdown("### 📄 Componentes com Papel e Impressão")
+for tipo, _, _, *widgets in COMPONENTES_UI:
+    bloco_componente(tipo, *widgets)
 
-# === Miolo ===
-miolos = sorted(df_miolos['Miolo'].dropna().unique())
-miolo_opcoes = ["Personalizado"] + list(miolos)
-inclui_miolo = st.checkbox("📘 Incluir Miolo?", value=False)
-if inclui_miolo:
-    miolo_selecionado = st.selectbox("Miolo:", options=miolo_opcoes, index=0, key="miolo")
-    if miolo_selecionado == "Personalizado":
-        col1, col2, col3 = st.columns(3)
-        papel_miolo = col1.selectbox("Papel utilizado (miolo)", options=papeis_unicos, index=0, key="papel_miolo")
-        aproveitamento_miolo = col2.number_input("Aproveitamento (unidades por folha)", min_value=0.1, value=5.0, step=0.1, key="aprov_miolo")
-        valor_servico_miolo = col3.number_input("Valor total do serviço (impressão)", min_value=0.0, value=13050.0, key="serv_miolo")
-    else:
-        papel_miolo = None
-else:
-    miolo_selecionado = None
-
-# === Bolsa ===
-bolsas = sorted(df_bolsas['Bolsa'].dropna().unique())
-bolsa_opcoes = ["Personalizado"] + list(bolsas)
-inclui_bolsa = st.checkbox("👜 Incluir Bolsa?", value=False)
-if inclui_bolsa:
-    bolsa_selecionada = st.selectbox("Bolsa:", options=bolsa_opcoes, index=0, key="bolsa")
-    if bolsa_selecionada == "Personalizado":
-        col1, col2, col3 = st.columns(3)
-        papel_bolsa = col1.selectbox("Papel utilizado (bolsa)", options=papeis_unicos, index=0, key="papel_bolsa")
-        aproveitamento_bolsa = col2.number_input("Aproveitamento (unidades por folha)", min_value=0.1, value=4.0, step=0.1, key="aprov_bolsa")
-        valor_servico_bolsa = col3.number_input("Valor total do serviço (impressão)", min_value=0.0, value=2425.0, key="serv_bolsa")
-    else:
-        papel_bolsa = None
-else:
-    bolsa_selecionada = None
-
-# === Divisória ===
-divisorias = sorted(df_divisorias['Divisoria'].dropna().unique())
-divisoria_opcoes = ["Personalizado"] + list(divisorias)
-inclui_divisoria = st.checkbox("🔖 Incluir Divisória?", value=False)
-if inclui_divisoria:
-    divisoria_selecionada = st.selectbox("Divisória:", options=divisoria_opcoes, index=0, key="divisoria")
-    if divisoria_selecionada == "Personalizado":
-        col1, col2, col3 = st.columns(3)
-        papel_divisoria = col1.selectbox("Papel utilizado (divisória)", options=papeis_unicos, index=0, key="papel_divisoria")
-        aproveitamento_divisoria = col2.number_input("Aproveitamento (unidades por folha)", min_value=0.1, value=3.0, step=0.1, key="aprov_div")
-        valor_servico_divisoria = col3.number_input("Valor total do serviço (impressão)", min_value=0.0, value=22986.0, key="serv_div")
-    else:
-        papel_divisoria = None
-else:
-    divisoria_selecionada = None
-
-# === Adesivo ===
-adesivos = sorted(df_adesivos['Adesivo'].dropna().unique())
-adesivo_opcoes = ["Personalizado"] + list(adesivos)
-inclui_adesivo = st.checkbox("🏷️ Incluir Adesivo?", value=False)
-if inclui_adesivo:
-    adesivo_selecionado = st.selectbox("Adesivo:", options=adesivo_opcoes, index=0, key="adesivo")
-    if adesivo_selecionado == "Personalizado":
-        col1, col2, col3 = st.columns(3)
-        papel_adesivo = col1.selectbox("Papel utilizado (adesivo)", options=papeis_unicos, index=0, key="papel_adesivo")
-        aproveitamento_adesivo = col2.number_input("Aproveitamento (unidades por folha)", min_value=0.1, value=10.0, step=0.1, key="aprov_adesivo")
-        valor_servico_adesivo = col3.number_input("Valor total do serviço (impressão)", min_value=0.0, value=4840.0, key="serv_adesivo")
+# ================== COMPRAS DIRETAS ==================
+@cronometrar('bloco.compra_direta')
+def bloco_compra_direta(categoria):
+    coluna = f"{PREFIXO_CD}{categoria}"
+    # Checkbox para incluir
+    if not st.checkbox(f"🔧 Incluir {categoria}?", key=inicial(f"check_{categoria}", False)):
+        publicar_bloco(coluna, None)
+        return
+
+    selecionado = st.selectbox(f"{categoria}:", options=opcoes_cd[categoria], key=f"cd_{categoria}")
+    config_bloco = {coluna: selecionado}
+    if selecionado == "Personalizado":
+        config_bloco[f"{coluna}_valor_unitario"] = st.number_input(f"Valor unitário do {categoria} personalizado", min_value=0.0, key=inicial(f"vu_{categoria}", 1.0))
+        config_bloco[f"{coluna}_aproveitamento"] = st.number_input(f"Aproveitamento (ex: 0.3 para 30cm de 1m)", min_value=0.0, step=0.01, key=inicial(f"aprov_{categoria}", 1.0))
+    elif categoria == "WIRE-O":
+        # WIRE-O: preço por caixa → anéis por caixa → anéis por produto
+        config_bloco[f"{coluna}_aneis"] = st.number_input(f"Número de anéis por unidade ({selecionado})", min_value=1, step=1, key=inicial(f"aneis_{selecionado}", 1))
     else:
-        papel_adesivo = None
-else:
-    adesivo_selecionado = None
+        config_bloco[f"{coluna}_aproveitamento"] = st.number_input(f"Aproveitamento ({selecionado})", min_value=0.0, step=0.01, key=inicial(f"aprov_{selecionado}", 1.0))
+    publicar_bloco(coluna, config_bloco)
 
-# ================== COMPRAS DIRETAS ==================
+secoes.marcar('compras_diretas')
 st.divider()
 st.markdown("### 🔧 Compras Diretas (Aviamentos, Embalagens, etc.)")
+for categoria in catalogo_cd.categorias():
+    bloco_compra_direta(categoria)
 
-custos_cd = {}
-
-for categoria in sorted(categorias_cd.keys()):
-    itens = categorias_cd[categoria]
-    nomes_itens = [item['NomeLimpo'] for item in itens]
-    opcoes = ["Personalizado"] + nomes_itens
+# ================== CALCULAR CUSTOS ==================
+secoes.marcar('resultados')
+# Configuração do orçamento no formato do motor de custos (ver custos.py)
+config = {'quantidade': quantidade_orcamento}
+for config_bloco, _ in blocos.values():
+    config.update(config_bloco or {})
+
+def precos_na_base(papeis):
+    # Mesma base de preço do orçamento (funcoes_de_preco devolve None na base padrão)
+    precos_papel, _ = funcoes_de_preco(motor_papel, motor_cd, *base_preco)
+    return (precos_papel or dados.indice_precos.precos_de)(papeis)
+
+def formatar_preco(preco):
+    return "sem preço na base" if np.isnan(preco) else f"R$ {preco:,.2f}".replace('.', ',')
+
+for tipo, *_ in COMPONENTES_UI:
+    config_bloco, resultado = blocos[tipo]
+    if config_bloco and np.isnan(resultado[f'{tipo}_custo']):
+        papel = resultado[f'{tipo}_papel_usado']
+        alerta, icone = (st.error, "❌") if config_bloco[tipo] == PERSONALIZADO else (st.warning, "⚠️")
+        if usar_data_preco and papel in dados.indice_precos:
+            # O papel tem compra, mas nenhuma até a data de referência
+            alerta(f"{icone} Sem preço para **{papel}** em {data_preco:%d/%m/%Y}: nenhuma compra até essa data")
+        else:
+            alerta(f"{icone} Papel não encontrado: **{papel}**")
+        sugestoes = [sugestao for sugestao in dados.sugerir_papeis(papel or "") if sugestao.papel != papel]
+        if sugestoes:
+            precos = precos_na_base([sugestao.papel for sugestao in sugestoes])
+            st.caption("Papéis com compra mais parecidos (preço na base escolhida): " + "; ".join(
+                f"{sugestao.papel} ({sugestao.pontuacao:.0%}, {formatar_preco(preco)})"
+                for sugestao, preco in zip(sugestoes, precos)))
 
-    # Checkbox para incluir
-    inclui = st.checkbox(f"🔧 Incluir {categoria}?", value=False, key=f"check_{categoria}")
-    if not inclui:
+custos_cd = {}
+for categoria in catalogo_cd.categorias():
+    coluna = f"{PREFIXO_CD}{categoria}"
+    config_bloco, resultado = blocos[coluna]
+    if config_bloco is None:
         continue
-
-    selecionado = st.selectbox(f"{categoria}:", options=opcoes, key=f"cd_{categoria}")
-
-    if selecionado == "Personalizado":
-        valor_unitario = st.number_input(f"Valor unitário do {categoria} personalizado", min_value=0.0, value=1.0, key=f"vu_{categoria}")
-        aproveitamento = st.number_input(f"Aproveitamento (ex: 0.3 para 30cm de 1m)", min_value=0.0, value=1.0, step=0.01, key=f"aprov_{categoria}")
-        custos_cd[categoria] = valor_unitario * aproveitamento
+    valor = resultado[f'{coluna}_custo']
+    if np.isnan(valor):
+        st.warning(f"⚠️ Sem preço para **{config_bloco[coluna]}** na base de preço escolhida.")
     else:
-        item = next((i for i in itens if i['NomeLimpo'] == selecionado), None)
-        if item:
-            preco_unitario = item['VALOR_UNITARIO']
-            if categoria == "WIRE-O":
-                # WIRE-O: preço por caixa → anéis por caixa → anéis por produto
-                quantidade_por_caixa = mapeamento_wireo.get(selecionado, 6000)
-                aneis_por_unidade = st.number_input(f"Número de anéis por unidade ({selecionado})", min_value=1, value=1, step=1, key=f"aneis_{selecionado}")
-                preco_por_anel = preco_unitario / quantidade_por_caixa
-                custos_cd[categoria] = preco_por_anel * aneis_por_unidade
-            else:
-                aproveitamento = st.number_input(f"Aproveitamento ({selecionado})", min_value=0.0, value=1.0, step=0.01, key=f"aprov_{selecionado}")
-                custos_cd[categoria] = preco_unitario * aproveitamento
-
-# ================== CALCULAR CUSTOS ==================
-custo_miolo = None
-custo_bolsa = None
-custo_divisoria = None
-custo_adesivo = None
-
-# Miolo
-if inclui_miolo and miolo_selecionado and miolo_selecionado != "Personalizado":
-    custo_miolo = calcular_custo(miolo_selecionado, df_miolos, "Miolo")
-elif inclui_miolo and miolo_selecionado == "Personalizado":
-    custo_miolo = calcular_personalizado(papel_miolo, aproveitamento_miolo, valor_servico_miolo, quantidade_orcamento)
-
-# Bolsa
-if inclui_bolsa and bolsa_selecionada and bolsa_selecionada != "Personalizado":
-    custo_bolsa = calcular_custo(bolsa_selecionada, df_bolsas, "Bolsa")
-elif inclui_bolsa and bolsa_selecionada == "Personalizado":
-    custo_bolsa = calcular_personalizado(papel_bolsa, aproveitamento_bolsa, valor_servico_bolsa, quantidade_orcamento)
-
-# Divisória
-if inclui_divisoria and divisoria_selecionada and divisoria_selecionada != "Personalizado":
-    custo_divisoria = calcular_custo(divisoria_selecionada, df_divisorias, "Divisoria")
-elif inclui_divisoria and divisoria_selecionada == "Personalizado":
-    custo_divisoria = calcular_personalizado(papel_divisoria, aproveitamento_divisoria, valor_servico_divisoria, quantidade_orcamento)
-
-# Adesivo
-if inclui_adesivo and adesivo_selecionado and adesivo_selecionado != "Personalizado":
-    custo_adesivo = calcular_custo(adesivo_selecionado, df_adesivos, "Adesivo")
-elif inclui_adesivo and adesivo_selecionado == "Personalizado":
-    custo_adesivo = calcular_personalizado(papel_adesivo, aproveitamento_adesivo, valor_servico_adesivo, quantidade_orcamento)
+        custos_cd[categoria] = valor
 
 # ================== EXIBIR RESULTADOS ==================
 st.divider()
@@ -310,45 +250,18 @@ st.subheader("📊 Resultados por Componente")
 
 cols = st.columns(4)
 
-# Exibir Miolo
-if inclui_miolo and miolo_selecionado != "Personalizado" and custo_miolo:
-    with cols[0]:
-        st.markdown(f"**{miolo_selecionado}**")
-        st.metric("Custo Unit.", f"R$ {custo_miolo[0]:,.2f}".replace('.', ','))
-elif inclui_miolo and miolo_selecionado == "Personalizado" and custo_miolo:
-    with cols[0]:
-        st.markdown("**Miolo Personalizado**")
-        st.metric("Custo Unit.", f"R$ {custo_miolo[0]:,.2f}".replace('.', ','))
-
-# Exibir Bolsa
-if inclui_bolsa and bolsa_selecionada != "Personalizado" and custo_bolsa:
-    with cols[1]:
-        st.markdown(f"**{bolsa_selecionada}**")
-        st.metric("Custo Unit.", f"R$ {custo_bolsa[0]:,.2f}".replace('.', ','))
-elif inclui_bolsa and bolsa_selecionada == "Personalizado" and custo_bolsa:
-    with cols[1]:
-        st.markdown("**Bolsa Personalizada**")
-        st.metric("Custo Unit.", f"R$ {custo_bolsa[0]:,.2f}".replace('.', ','))
-
-# Exibir Divisória
-if inclui_divisoria and divisoria_selecionada != "Personalizado" and custo_divisoria:
-    with cols[2]:
-        st.markdown(f"**{divisoria_selecionada}**")
-        st.metric("Custo Unit.", f"R$ {custo_divisoria[0]:,.2f}".replace('.', ','))
-elif inclui_divisoria and divisoria_selecionada == "Personalizado" and custo_divisoria:
-    with cols[2]:
-        st.markdown("**Divisória Personalizada**")
-        st.metric("Custo Unit.", f"R$ {custo_divisoria[0]:,.2f}".replace('.', ','))
-
-# Exibir Adesivo
-if inclui_adesivo and adesivo_selecionado != "Personalizado" and custo_adesivo:
-    with cols[3]:
-        st.markdown(f"**{adesivo_selecionado}**")
-        st.metric("Custo Unit.", f"R$ {custo_adesivo[0]:,.2f}".replace('.', ','))
-elif inclui_adesivo and adesivo_selecionado == "Personalizado" and custo_adesivo:
-    with cols[3]:
-        st.markdown("**Adesivo Personalizado**")
-        st.metric("Custo Unit.", f"R$ {custo_adesivo[0]:,.2f}".replace('.', ','))
+custos_componentes = []
+for i, (tipo, rotulo, rotulo_personalizado, *_) in enumerate(COMPONENTES_UI):
+    config_bloco, resultado = blocos[tipo]
+    if not config_bloco or np.isnan(resultado[f'{tipo}_custo']):
+        continue
+    selecionado = config_bloco[tipo]
+    custo = resultado[f'{tipo}_custo']
+    personalizado = selecionado == PERSONALIZADO
+    custos_componentes.append((f"{rotulo} (Pers.)" if personalizado else rotulo, custo))
+    with cols[i]:
+        st.markdown(f"**{rotulo_personalizado if personalizado else selecionado}**")
+        st.metric("Custo Unit.", f"R$ {custo:,.2f}".replace('.', ','))
 
 # Exibir Compras Diretas
 if custos_cd:
@@ -370,33 +283,9 @@ st.subheader("💰 Custo Total Unitário do Produto")
 custo_total = 0.0
 itens = []
 
-if inclui_miolo and miolo_selecionado != "Personalizado" and custo_miolo:
-    custo_total += custo_miolo[0]
-    itens.append("Miolo")
-elif inclui_miolo and miolo_selecionado == "Personalizado" and custo_miolo:
-    custo_total += custo_miolo[0]
-    itens.append("Miolo (Pers.)")
-
-if inclui_bolsa and bolsa_selecionada != "Personalizado" and custo_bolsa:
-    custo_total += custo_bolsa[0]
-    itens.append("Bolsa")
-elif inclui_bolsa and bolsa_selecionada == "Personalizado" and custo_bolsa:
-    custo_total += custo_bolsa[0]
-    itens.append("Bolsa (Pers.)")
-
-if inclui_divisoria and divisoria_selecionada != "Personalizado" and custo_divisoria:
-    custo_total += custo_divisoria[0]
-    itens.append("Divisória")
-elif inclui_divisoria and divisoria_selecionada == "Personalizado" and custo_divisoria:
-    custo_total += custo_divisoria[0]
-    itens.append("Divisória (Pers.)")
-
-if inclui_adesivo and adesivo_selecionado != "Personalizado" and custo_adesivo:
-    custo_total += custo_adesivo[0]
-    itens.append("Adesivo")
-elif inclui_adesivo and adesivo_selecionado == "Personalizado" and custo_adesivo:
-    custo_total += custo_adesivo[0]
-    itens.append("Adesivo (Pers.)")
+for rotulo, custo in custos_componentes:
+    custo_total += custo
+    itens.append(rotulo)
 
 # Compras diretas
 for cat, valor in custos_cd.items():
@@ -409,6 +298,188 @@ if itens:
 else:
     st.warning("Nenhum item selecionado.")
 
+# ================== ORÇAMENTOS SALVOS ==================
+def carregar_orcamento(id_orcamento):
+    # Callback do botão: preenche as chaves dos widgets antes da reexecução
+    orcamento = obter_armazem().carregar(id_orcamento)
+    if orcamento is None:
+        return
+    salvo, estado = orcamento.config, st.session_state
+    estado['quantidade_orcamento'] = int(salvo['quantidade'])
+    if orcamento.base_preco is not None:
+        metodo, data, custo = orcamento.base_preco
+        estado['metodo_preco'] = next(rotulo for rotulo, m in METODOS_PRECO.items() if m == metodo)
+        estado['usar_data_preco'] = data is not None
+        if data is not None:
+            estado['data_preco'] = date.fromisoformat(data)
+        estado['custo_posto'] = bool(custo)
+
+    ausentes = []
+    for tipo, _, _, _, _, chave, _, chave_aprov, _, chave_serv, _ in COMPONENTES_UI:
+        selecionado = salvo.get(tipo)
+        if selecionado is not None and selecionado not in opcoes_componentes[tipo]:
+            ausentes.append(selecionado)
+            selecionado = None
+        estado[f"inclui_{chave}"] = selecionado is not None
+        if selecionado is None:
+            continue
+        estado[chave] = selecionado
+        if selecionado == PERSONALIZADO:
+            if salvo.get(f'{tipo}_papel') in papeis_unicos:
+                estado[f"papel_{chave}"] = salvo[f'{tipo}_papel']
+            else:
+                ausentes.append(salvo.get(f'{tipo}_papel'))
+            estado[chave_aprov] = float(salvo[f'{tipo}_aproveitamento'])
+            estado[chave_serv] = float(salvo[f'{tipo}_valor_servico'])
+
+    for categoria in catalogo_cd.categorias():
+        coluna = f"{PREFIXO_CD}{categoria}"
+        selecionado = salvo.get(coluna)
+        if selecionado is not None and selecionado not in opcoes_cd[categoria]:
+            ausentes.append(selecionado)
+            selecionado = None
+        estado[f"check_{categoria}"] = selecionado is not None
+        if selecionado is None:
+            continue
+        estado[f"cd_{categoria}"] = selecionado
+        if selecionado == PERSONALIZADO:
+            estado[f"vu_{categoria}"] = float(salvo[f"{coluna}_valor_unitario"])
+            estado[f"aprov_{categoria}"] = float(salvo[f"{coluna}_aproveitamento"])
+        elif categoria == "WIRE-O":
+            estado[f"aneis_{selecionado}"] = int(salvo.get(f"{coluna}_aneis", 1))
+        else:
+            estado[f"aprov_{selecionado}"] = float(salvo.get(f"{coluna}_aproveitamento", 1.0))
+    estado['orcamento_carregado'] = (orcamento.nome, [a for a in ausentes if a])
+
+secoes.marcar('orcamentos_salvos')
+armazem = obter_armazem()
+if 'orcamento_carregado' in st.session_state:
+    nome, ausentes = st.session_state.pop('orcamento_carregado')
+    st.info(f"📂 Orçamento **{nome}** carregado.")
+    if ausentes:
+        st.warning(f"⚠️ Itens do orçamento salvo que não existem mais nos dados: {', '.join(ausentes)}")
+
+# Algum componente incluído ficou sem preço (e fora do total)
+incompleto = any(config_bloco and bool(resultado['incompleto']) for config_bloco, resultado in blocos.values())
+
+if itens:
+    col1, col2 = st.columns([3, 1], vertical_alignment="bottom")
+    nome_orcamento = col1.text_input("Nome do orçamento", key="nome_orcamento")
+    if col2.button("💾 Salvar orçamento", disabled=not nome_orcamento.strip()):
+        id_salvo = armazem.salvar(nome_orcamento.strip(), config, base_preco, custo_total, versoes, incompleto)
+        st.success(f"Orçamento #{id_salvo} salvo.")
+    if incompleto:
+        st.caption("⚠️ Há componentes sem preço: o orçamento será salvo como incompleto e fica fora da comparação na reprecificação.")
+
+with st.expander("📂 Orçamentos salvos"):
+    lista = armazem.listar(status=ABERTO if st.checkbox("Só abertos", value=True, key="so_abertos") else None)
+    if lista.empty:
+        st.caption("Nenhum orçamento salvo.")
+    else:
+        st.dataframe(lista.set_index('id'))
+        rotulos = dict(zip(lista['id'], lista['nome']))
+        escolhido = st.selectbox("Orçamento", options=list(rotulos),
+                                 format_func=lambda i: f"#{i} — {rotulos[i]}", key="orcamento_escolhido")
+        col1, col2, col3 = st.columns(3)
+        col1.button("Carregar", on_click=carregar_orcamento, args=(escolhido,))
+        if col2.button("Marcar como fechado"):
+            armazem.alterar_status(escolhido, 'fechado')
+            st.rerun()
+        if col3.button("Excluir"):
+            armazem.excluir(escolhido)
+            st.rerun()
+
+    # Todos os abertos de uma vez, com os preços mais recentes dos dados carregados
+    if st.button("🔄 Reprecificar abertos"):
+        st.session_state['reprecificacao'] = armazem.reprecificar(dados)
+    if 'reprecificacao' in st.session_state:
+        deltas = st.session_state['reprecificacao']
+        st.caption(f"{len(deltas)} orçamentos reprecificados; {int((deltas['delta'] > 0).sum())} ficaram abaixo do custo atual"
+                   f" ({int(deltas['incompleto'].sum())} incompletos, sem comparação).")
+        st.dataframe(deltas.set_index('id').round(4))
+
+# ================== SENSIBILIDADE À QUANTIDADE ==================
+@st.cache_data(max_entries=32)
+def calcular_sensibilidade(versoes, config, quantidades, aproveitamentos, campo_aproveitamento,
+                           base_preco, _motor_custos, _motor_papel, _motor_cd):
+    # Chave do cache: versões dos dados + seleção atual + grade + base de preço
+    contar('cache.calcular_sensibilidade.misses')
+    precos_papel, precos_cd = funcoes_de_preco(_motor_papel, _motor_cd, *base_preco)
+    return _motor_custos.sensibilidade(config, quantidades, aproveitamentos, campo_aproveitamento,
+                                       precos_papel, precos_cd)
+
+secoes.marcar('sensibilidade')
+if itens:
+    with st.expander("📈 Sensibilidade: custo unitário × quantidade"):
+        col1, col2, col3 = st.columns(3)
+        qtd_min = col1.number_input("Quantidade mínima", min_value=1, value=max(1, quantidade_orcamento // 10), step=1, key="sens_qmin")
+        qtd_max = col2.number_input("Quantidade máxima", min_value=1, value=quantidade_orcamento * 4, step=1, key="sens_qmax")
+        pontos = col3.number_input("Pontos", min_value=2, max_value=2000, value=200, step=1, key="sens_pontos")
+        # Espaçamento logarítmico: o serviço cai com 1/quantidade
+        quantidades = tuple(np.unique(np.geomspace(min(qtd_min, qtd_max), max(qtd_min, qtd_max), int(pontos)).round()))
+
+        campos_aproveitamento = {f"{tipo}_aproveitamento": rotulo for tipo, rotulo, *_ in COMPONENTES_UI
+                                 if config.get(tipo) == PERSONALIZADO}
+        campos_aproveitamento.update({campo: campo[len(PREFIXO_CD):-len("_aproveitamento")]
+                                      for campo in config if campo.startswith(PREFIXO_CD) and campo.endswith("_aproveitamento")})
+        campo = st.selectbox("Variar também o aproveitamento de", options=[None] + list(campos_aproveitamento),
+                             format_func=lambda c: "(nenhum)" if c is None else campos_aproveitamento[c], key="sens_campo")
+        aproveitamentos = None
+        if campo is not None:
+            atual = float(config[campo])
+            col1, col2, col3 = st.columns(3)
+            aprov_min = col1.number_input("Aproveitamento mínimo", min_value=0.01, value=max(0.01, atual * 0.5), key="sens_amin")
+            aprov_max = col2.number_input("Aproveitamento máximo", min_value=0.01, value=max(0.01, atual * 1.5), key="sens_amax")
+            aprov_pontos = col3.number_input("Valores de aproveitamento", min_value=2, max_value=20, value=5, step=1, key="sens_apontos")
+            aproveitamentos = tuple(np.linspace(aprov_min, aprov_max, int(aprov_pontos)).round(4))
+
+        contar('cache.calcular_sensibilidade.chamadas')
+        grade = calcular_sensibilidade(versoes, config, quantidades, aproveitamentos, campo, base_preco,
+                                       motor_custos, motor_papel, motor_cd)
+        if campo is None:
+            curva = grade.set_index('quantidade')[['total']].rename(columns={'total': 'Custo unitário'})
+        else:
+            curva = grade.pivot(index='quantidade', columns='aproveitamento', values='total')
+            curva.columns = [f"Aprov. {a:g}" for a in curva.columns]
+        st.line_chart(curva)
+        st.dataframe(curva.round(4))
+
 # ================== RODAPÉ ==================
 st.markdown("---")
-st.caption("✅ Cálculo: `(Preço do Papel / Aproveitamento) + (Valor do Serviço / Quantidade)` + Compras Diretas (com aproveitamento)")
\ No newline at end of file
+st.caption("✅ Cálculo: `(Preço do Papel / Aproveitamento) + (Valor do Serviço / Quantidade)` + Compras Diretas (com aproveitamento)")
+secoes.encerrar()
+
+# ================== PAINEL DE DEPURAÇÃO ==================
+if depuracao:
+    if perfil is not None:
+        st.session_state['relatorio_perfil'] = encerrar_perfil(perfil)
+    medicoes = REGISTRO.dados()
+    with st.sidebar:
+        st.markdown("### 🛠️ Depuração")
+        if medicoes['etapas']:
+            etapas = pd.DataFrame.from_dict(medicoes['etapas'], orient='index')
+            etapas['media_s'] = etapas['total_s'] / etapas['execucoes']
+            st.dataframe((etapas[['execucoes', 'ultima_s', 'media_s', 'max_s', 'total_s']] * [1, 1000, 1000, 1000, 1000])
+                         .rename(columns=lambda c: c.replace('_s', ' (ms)')).round(2))
+        caches = sorted({nome.split('.')[1] for nome in medicoes['contadores'] if nome.startswith('cache.')})
+        if caches:
+            contadores = medicoes['contadores']
+            st.dataframe(pd.DataFrame([
+                {'cache': nome, 'chamadas': contadores.get(f'cache.{nome}.chamadas', 0),
+                 'misses': contadores.get(f'cache.{nome}.misses', 0)} for nome in caches
+            ]).assign(hits=lambda df: df['chamadas'] - df['misses']).set_index('cache'))
+        st.caption("Carregador de fontes")
+        st.json(obter_carregador().estatisticas, expanded=False)
+        col1, col2 = st.columns(2)
+        col1.download_button("JSON", REGISTRO.exportar_json(), file_name="instrumentacao.json", mime="application/json")
+        col2.download_button("Prometheus", REGISTRO.exportar_prometheus(), file_name="instrumentacao.prom", mime="text/plain")
+        col1, col2 = st.columns(2)
+        if col1.button("Zerar"):
+            REGISTRO.zerar()
+            st.rerun()
+        if col2.button("Perfilar próximo rerun"):
+            st.session_state['perfilar_proxima'] = True
+            st.rerun()
+        if 'relatorio_perfil' in st.session_state:
+            with st.expander("Perfil do último rerun perfilado"):
+                st.code(st.session_state['relatorio_perfil'], language=None)
@@ -0,0 +1,9 @@
+"""Benchmarks de carregamento, limpeza, consulta e orçamento sobre dados sintéticos.
+
+Uso (offline, a partir da raiz do repositório):
+    python -m benchmark [--escalas 10 100] [--saida resultados.json] [--gravar-linha-de-base]
+
+`gerador` escreve CSVs com os mesmos esquemas dos da raiz, N vezes maiores;
+`medicoes` cronometra cada etapa; o resultado é comparado com
+`benchmark/linha_de_base.json` e o comando sai com erro se alguma etapa regrediu.
+"""
@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmark.gerador import gerar
+from benchmark.medicoes import MEDICOES, medir
+
+# Tempos absolutos só valem na máquina que os mediu: a linha de base é local, fora do git
+LINHA_DE_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "linha_de_base.json")
+ESCALAS_PADRAO = [10, 100]
+TOLERANCIA_PADRAO = 0.25  # mediana até 25% acima da linha de base não conta como regressão
+
+
+def executar(escalas, repeticoes, medicoes=None, dados=None):
+    resultados = {}
+    for escala in escalas:
+        with tempfile.TemporaryDirectory(prefix=f"benchmark-{escala}x-") as temporario:
+            diretorio = os.path.join(dados, f"{escala}x") if dados else temporario
+            gerar(diretorio, escala)
+            resultados[str(escala)] = medir(diretorio, repeticoes, medicoes)
+            print(f"  {escala}x: " + ", ".join(f"{nome} {r['mediana_s'] * 1000:.2f} ms"
+                                              for nome, r in resultados[str(escala)].items()), file=sys.stderr)
+    return {
+        "ambiente": {"python": platform.python_version(), "pandas": pd.__version__,
+                     "plataforma": platform.platform(), "processador": platform.processor(),
+                     "executado_em": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "resultados": resultados,
+    }
+
+
+def comparar(atual, base, tolerancia=TOLERANCIA_PADRAO):
+    """Lista de (escala, medição, mediana atual, mediana da base) acima da tolerância."""
+    regressoes = []
+    for escala, medicoes in atual["resultados"].items():
+        for nome, resultado in medicoes.items():
+            anterior = base.get("resultados", {}).get(escala, {}).get(nome)
+            if anterior and resultado["mediana_s"] > anterior["mediana_s"] * (1 + tolerancia):
+                regressoes.append((escala, nome, resultado["mediana_s"], anterior["mediana_s"]))
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmark",
+                                     description="Benchmarks sobre dados sintéticos (roda offline).")
+    parser.add_argument("--escalas", type=int, nargs="+", default=ESCALAS_PADRAO,
+                        help="multiplicadores do tamanho dos CSVs (ex.: 10 100 1000)")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--medicoes", nargs="+", choices=list(MEDICOES), default=None)
+    parser.add_argument("--dados", default=None, help="mantém os CSVs gerados neste diretório")
+    parser.add_argument("--saida", default=None, help="grava o JSON dos resultados neste arquivo")
+    parser.add_argument("--linha-de-base", default=LINHA_DE_BASE)
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO)
+    parser.add_argument("--gravar-linha-de-base", action="store_true",
+                        help="substitui a linha de base pelos resultados desta execução")
+    args = parser.parse_args(argv)
+
+    atual = executar(args.escalas, args.repeticoes, args.medicoes, args.dados)
+    texto = json.dumps(atual, indent=2, ensure_ascii=False)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+    else:
+        print(texto)
+
+    if args.gravar_linha_de_base:
+        with open(args.linha_de_base, "w", encoding="utf-8") as f:
+            f.write(texto + "\n")
+        print(f"✅ Linha de base gravada em {args.linha_de_base}", file=sys.stderr)
+        return 0
+
+    try:
+        with open(args.linha_de_base, encoding="utf-8") as f:
+            base = json.load(f)
+    except OSError:
+        print("⚠️ Sem linha de base nesta máquina: grave uma com --gravar-linha-de-base.", file=sys.stderr)
+        return 0
+    regressoes = comparar(atual, base, args.tolerancia)
+    for escala, nome, agora, antes in regressoes:
+        print(f"❌ {nome} ({escala}x): {agora * 1000:.2f} ms, linha de base {antes * 1000:.2f} ms",
+              file=sys.stderr)
+    if not regressoes:
+        print("✅ Nenhuma regressão em relação à linha de base.", file=sys.stderr)
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
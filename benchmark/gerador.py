@@ -0,0 +1,98 @@
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from fontes import (ARQUIVO_COMPRA_DIRETA, ARQUIVO_COMPRAS, ARQUIVO_TABELA_WIREO, ARQUIVO_USO_PAPEL_ADESIVO,
+                    ARQUIVO_USO_PAPEL_BOLSA, ARQUIVO_USO_PAPEL_DIVISORIA, ARQUIVO_USO_PAPEL_MIOLO)
+
+# ================== GERADOR DE DADOS SINTÉTICOS ==================
+# Reamostra as linhas dos CSVs reais (mesmas colunas, mesmos formatos de data e de
+# valor) e perturba nomes, datas e preços. Parte dos nomes ganha outra gramatura,
+# então o número de papéis distintos também cresce com a escala, como num histórico
+# real. A semente fixa deixa os arquivos idênticos entre execuções.
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARQUIVOS_USO = (ARQUIVO_USO_PAPEL_MIOLO, ARQUIVO_USO_PAPEL_BOLSA, ARQUIVO_USO_PAPEL_DIVISORIA,
+                ARQUIVO_USO_PAPEL_ADESIVO)
+GRAMATURAS = np.array([56, 63, 75, 90, 115, 120, 150, 170, 180, 210, 240, 250, 300])
+FRACAO_VARIANTES = 0.3
+
+_GRAMATURA = re.compile(r'\d+(?=\s*G)', re.IGNORECASE)
+
+
+def _ler(origem, arquivo):
+    return pd.read_csv(os.path.join(origem, arquivo), dtype=str, keep_default_na=False, encoding='utf-8')
+
+
+def _reamostrar(df, escala, rng):
+    return df.iloc[rng.integers(0, len(df), size=len(df) * escala)].reset_index(drop=True)
+
+
+def _variar_nomes(nomes, rng):
+    variar = rng.random(len(nomes)) < FRACAO_VARIANTES
+    gramaturas = rng.choice(GRAMATURAS, size=len(nomes)).astype(str)
+    novos = [_GRAMATURA.sub(g, nome, count=1) if v else nome
+             for nome, v, g in zip(nomes, variar, gramaturas)]
+    return pd.Series(novos, index=nomes.index)
+
+
+def _datas(n, rng, inicio='2021-01-01', dias=5 * 365):
+    return pd.Timestamp(inicio) + pd.to_timedelta(rng.integers(0, dias, size=n), unit='D')
+
+
+def _fator(n, rng):
+    return rng.uniform(0.8, 1.25, size=n)
+
+
+def gerar_compras(df, escala, rng):
+    df = _reamostrar(df, escala, rng)
+    colunas = list(df.columns)
+    df[colunas[0]] = _variar_nomes(df[colunas[0]], rng)
+    # DATA_SOLICITAÇÃO, PRAZO_DESEJADO, DATA_APROVAÇÃO, DATA_EMISSAO_NF, PREVISAO_ENTREGA
+    base = _datas(len(df), rng)
+    for coluna, deslocamento in zip(colunas[2:7], (0, 9, 5, 7, 9)):
+        df[coluna] = (base + pd.to_timedelta(deslocamento, unit='D')).strftime('%d/%m/%Y')
+    valor = pd.to_numeric(df[colunas[-1]].str.replace('R$', '', regex=False), errors='coerce')
+    df[colunas[-1]] = ['' if pd.isna(v) else f'R$ {v:.2f}' for v in valor * _fator(len(df), rng)]
+    return df
+
+
+def gerar_compras_diretas(df, escala, rng):
+    df = _reamostrar(df, escala, rng)
+    df['DEMANDA'] = _variar_nomes(df['DEMANDA'], rng)
+    base = _datas(len(df), rng)
+    for coluna, deslocamento in (('DATA_SOLICITAÇÃO', 0), ('PRAZO_DESEJADO', 9), ('DATA_APROVAÇÃO', 5),
+                                 ('DATA_EMISSAO_NF', 7), ('PREVISAO_ENTREGA', 9)):
+        df[coluna] = (base + pd.to_timedelta(deslocamento, unit='D')).strftime('%Y-%m-%d')
+    valor = pd.to_numeric(df['VALOR_UNITARIO'], errors='coerce') * _fator(len(df), rng)
+    df['VALOR_UNITARIO'] = valor.round(4).astype(str).replace('nan', '')
+    return df
+
+
+def gerar_uso(df, escala, papeis, rng):
+    df = _reamostrar(df, escala, rng)
+    colunas = list(df.columns)
+    # Nomes únicos por linha (como produtos distintos) e papéis tirados das compras geradas
+    df[colunas[0]] = [f'{nome} #{i}' for i, nome in enumerate(df[colunas[0]])]
+    df[colunas[1]] = rng.choice(papeis, size=len(df))
+    return df
+
+
+def gerar(destino, escala, origem=RAIZ, semente=0):
+    """Escreve em `destino` os CSVs das fontes com `escala` vezes as linhas dos de `origem`."""
+    rng = np.random.default_rng(semente)
+    os.makedirs(destino, exist_ok=True)
+
+    compras = gerar_compras(_ler(origem, ARQUIVO_COMPRAS), escala, rng)
+    compras.to_csv(os.path.join(destino, ARQUIVO_COMPRAS), index=False, encoding='utf-8')
+    papeis = compras[compras.columns[0]].unique()
+    gerar_compras_diretas(_ler(origem, ARQUIVO_COMPRA_DIRETA), escala, rng).to_csv(
+        os.path.join(destino, ARQUIVO_COMPRA_DIRETA), index=False, encoding='utf-8')
+    for arquivo in ARQUIVOS_USO:
+        gerar_uso(_ler(origem, arquivo), escala, papeis, rng).to_csv(
+            os.path.join(destino, arquivo), index=False, encoding='utf-8')
+    shutil.copyfile(os.path.join(origem, ARQUIVO_TABELA_WIREO), os.path.join(destino, ARQUIVO_TABELA_WIREO))
+    return destino
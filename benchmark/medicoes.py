@@ -0,0 +1,205 @@
+import functools
+import os
+import pathlib
+import re
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+import dados
+import limpeza
+from custos import PERSONALIZADO, PREFIXO_CD
+from fontes import ARQUIVO_COMPRAS, CarregadorFontes
+from modelo import montar_dados
+from snapshot import Snapshot
+
+# ================== MEDIÇÕES ==================
+# Cada medição recebe o diretório de dados gerado e devolve uma função sem
+# argumentos; ela é executada `repeticoes` vezes e o resultado guarda a mediana e o
+# mínimo em segundos. Medições de consulta executam `CHAMADAS` vezes por repetição e
+# reportam o tempo por chamada.
+
+CHAMADAS = 50
+LINHAS_LOTE = 10_000
+LINHAS_ANEXADAS = 100
+
+
+def _url(diretorio):
+    # urllib lê file:// — o carregador real roda offline sobre os arquivos locais
+    return pathlib.Path(diretorio).resolve().as_uri()
+
+
+def _carregar(diretorio, snapshot=None):
+    valores, erros, _ = CarregadorFontes(base_url=_url(diretorio), snapshot=snapshot).carregar()
+    if erros:
+        nome, e = next(iter(erros.items()))
+        raise RuntimeError(f"Erro ao carregar {nome}: {e}")
+    return valores
+
+
+@functools.lru_cache(maxsize=1)
+def _dados(diretorio):
+    # Montado uma vez por diretório para as medições de consulta
+    return montar_dados(_carregar(diretorio))
+
+
+def ingestao(diretorio):
+    """Equivalente ao `carregar_dados()` frio: baixa, parseia, limpa e monta tudo."""
+    def executar():
+        montar_dados(_carregar(diretorio))
+    return executar
+
+
+def ingestao_snapshot(diretorio):
+    """Cold start com o snapshot Arrow já gravado (só GET condicional + memory-map)."""
+    pasta = os.path.join(diretorio, ".snapshot")
+    _carregar(diretorio, Snapshot(pasta))
+
+    def executar():
+        montar_dados(_carregar(diretorio, Snapshot(pasta)))
+    return executar
+
+
+def _compras_anexadas(diretorio):
+    # (histórico limpo, valor derivado dele, últimas LINHAS_ANEXADAS linhas do CSV de novo, limpas)
+    with open(os.path.join(diretorio, ARQUIVO_COMPRAS), 'rb') as f:
+        linhas = f.read().splitlines(keepends=True)
+    df = dados.ler_compras(b''.join(linhas))
+    novas = dados.ler_compras(linhas[0] + b''.join(linhas[-LINHAS_ANEXADAS:]))
+    return df, dados.derivar_compras(df), novas
+
+
+def atualizacao_completa(diretorio):
+    """Compras anexadas ao CSV com o índice e o motor de preços refeitos sobre o histórico."""
+    df, _, novas = _compras_anexadas(diretorio)
+
+    def executar():
+        dados.derivar_compras(dados.juntar_compras(df, novas))
+    return executar
+
+
+def atualizacao_incremental(diretorio):
+    """As mesmas compras anexadas juntadas ao índice e ao motor que já existiam."""
+    df, anterior, novas = _compras_anexadas(diretorio)
+
+    def executar():
+        dados.derivar_compras_anexadas(anterior, dados.juntar_compras(df, novas), novas)
+    return executar
+
+
+def _nomes_compras(diretorio):
+    return pd.read_csv(os.path.join(diretorio, ARQUIVO_COMPRAS), usecols=[0], encoding='utf-8').iloc[:, 0]
+
+
+def _limpar_papel_original(nome):
+    # Cópia da função que o app aplicava com `.apply`, com os `re.sub` inline (a linha
+    # de base da limpeza; `limpeza.limpar_papel` já usa as regexes pré-compiladas)
+    if pd.isna(nome):
+        return ""
+    nome = re.sub(r'^(MP\d{3}|COUCHE|CARTAO|PAPEL|20\d{3}|COLOR|SCRITURA|Papel|Cartão)\s*', '', str(nome), flags=re.IGNORECASE)
+    nome = re.sub(r'\s*UNICA-\w+', '', nome)
+    nome = re.sub(r'\s*-\s*SEM\s*LINER', '', nome, flags=re.IGNORECASE)
+    nome = re.sub(r'\s*-\s*CHAMBRIL', '', nome, flags=re.IGNORECASE)
+    nome = re.sub(r'\s+', ' ', nome).strip()
+    return nome.title()
+
+
+def limpeza_escalar(diretorio):
+    """A limpeza original linha a linha, como era aplicada no app."""
+    nomes = _nomes_compras(diretorio)
+
+    def executar():
+        nomes.apply(_limpar_papel_original)
+    return executar
+
+
+def limpeza_vetorizada(diretorio):
+    """`limpar_papeis` sem memo entre repetições (cada uma começa do zero)."""
+    nomes = _nomes_compras(diretorio)
+
+    def executar():
+        limpeza._Canonicalizador(limpeza._limpar_papeis_unicos, "")(nomes)
+    return executar
+
+
+def _configs(dados):
+    motor = dados.motor_custos
+    config = {'quantidade': 15000}
+    for tipo in motor.tabelas:
+        config[tipo] = motor.opcoes(tipo)[0]
+    for categoria in motor.catalogo.categorias():
+        config[f'{PREFIXO_CD}{categoria}'] = motor.catalogo.itens(categoria)[0]
+    tipo = next(iter(motor.tabelas))
+    componente = {'quantidade': 15000, tipo: motor.opcoes(tipo)[0]}
+    personalizado = {'quantidade': 15000, tipo: PERSONALIZADO, f'{tipo}_papel': dados.papeis_unicos[0],
+                     f'{tipo}_aproveitamento': 4.0, f'{tipo}_valor_servico': 1500.0}
+    return componente, personalizado, config
+
+
+def _por_chamada(diretorio, escolher):
+    dados = _dados(diretorio)
+    config = escolher(_configs(dados))
+
+    def executar():
+        for _ in range(CHAMADAS):
+            dados.motor_custos.orcar([config])
+    executar.chamadas = CHAMADAS
+    return executar
+
+
+def consulta_componente(diretorio):
+    """Custo de um componente da tabela (o antigo `calcular_custo`), sem cache."""
+    return _por_chamada(diretorio, lambda configs: configs[0])
+
+
+def consulta_personalizado(diretorio):
+    """Custo de um componente personalizado (o antigo `calcular_personalizado`), sem cache."""
+    return _por_chamada(diretorio, lambda configs: configs[1])
+
+
+def orcamento_completo(diretorio):
+    """Orçamento de ponta a ponta: quatro componentes e todas as categorias de compra direta."""
+    return _por_chamada(diretorio, lambda configs: configs[2])
+
+
+def orcamento_lote(diretorio):
+    """LINHAS_LOTE orçamentos completos numa chamada de `orcar` (tempo total)."""
+    dados = _dados(diretorio)
+    configs = pd.DataFrame([_configs(dados)[2]] * LINHAS_LOTE)
+    configs['quantidade'] = np.linspace(1000, 50000, LINHAS_LOTE)
+
+    def executar():
+        dados.motor_custos.orcar(configs)
+    return executar
+
+
+MEDICOES = {
+    'ingestao': ingestao,
+    'ingestao_snapshot': ingestao_snapshot,
+    'atualizacao_completa': atualizacao_completa,
+    'atualizacao_incremental': atualizacao_incremental,
+    'limpeza_escalar': limpeza_escalar,
+    'limpeza_vetorizada': limpeza_vetorizada,
+    'consulta_componente': consulta_componente,
+    'consulta_personalizado': consulta_personalizado,
+    'orcamento_completo': orcamento_completo,
+    'orcamento_lote': orcamento_lote,
+}
+
+
+def medir(diretorio, repeticoes=5, medicoes=None):
+    """{medição: {'mediana_s', 'minimo_s', 'repeticoes'}} para os dados em `diretorio`."""
+    resultados = {}
+    for nome in medicoes or MEDICOES:
+        executar = MEDICOES[nome](diretorio)
+        chamadas = getattr(executar, 'chamadas', 1)
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            executar()
+            tempos.append((time.perf_counter() - inicio) / chamadas)
+        resultados[nome] = {'mediana_s': statistics.median(tempos), 'minimo_s': min(tempos),
+                            'repeticoes': repeticoes}
+    return resultados
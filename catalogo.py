@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from limpeza import limpar_nomes_cd
+
+# ================== CATÁLOGO DE COMPRAS DIRETAS ==================
+# Um item por (categoria, NomeLimpo), com o preço da compra mais recente, montado
+# numa única passada (ordenação + drop_duplicates) em vez de um filtro por
+# categoria. Consultas por categoria e por item são lookups em dicionário.
+#
+# A tabela de anéis por caixa de WIRE-O é juntada pelo mesmo nome canônico
+# (`limpeza.limpar_nomes_cd`) usado em NomeLimpo, então o item escolhido no app
+# encontra a quantidade por caixa em vez de cair no padrão.
+
+COLUNA_CATEGORIA = 'CATEGORIA_MATERIAL_PCP'
+
+
+@dataclass(frozen=True)
+class ItemCatalogo:
+    categoria: str
+    nome: str
+    preco: float
+    data: Optional[pd.Timestamp]
+    fornecedor: Optional[str]
+    unidade: Optional[str]
+    quantidade_por_caixa: Optional[float] = None  # só WIRE-O
+
+
+def mapear_wireo(df_wireo):
+    """{nome canônico: anéis por caixa} a partir da tabela de WIRE-O."""
+    return dict(zip(limpar_nomes_cd(df_wireo['WIREO']), df_wireo['QUANTIDADE_POR_CAIXA']))
+
+
+class CatalogoCompraDireta:
+    def __init__(self, df_cd, mapeamento_wireo=None):
+        mapeamento_wireo = mapeamento_wireo or {}
+        # Mais recente por último; empates e compras sem data ficam na ordem do arquivo
+        ordenado = (df_cd.assign(_ordem=np.arange(len(df_cd)))
+                    .sort_values(['DataEfetiva', '_ordem'], na_position='first', kind='stable'))
+        recentes = ordenado.drop_duplicates(subset=[COLUNA_CATEGORIA, 'NomeLimpo'], keep='last')
+
+        self._itens = {}
+        self._por_categoria = {}
+        self._precos = {}
+        self._por_caixa = {}
+        for categoria, nome, preco, data, fornecedor, unidade in zip(
+                recentes[COLUNA_CATEGORIA], recentes['NomeLimpo'], recentes['VALOR_UNITARIO'],
+                recentes['DataEfetiva'], recentes.get('FORNECEDOR', pd.Series(None, index=recentes.index)),
+                recentes.get('UNIDADES', pd.Series(None, index=recentes.index))):
+            self._itens[(categoria, nome)] = ItemCatalogo(
+                categoria=categoria,
+                nome=nome,
+                preco=float(preco),
+                data=None if pd.isna(data) else data,
+                fornecedor=None if pd.isna(fornecedor) else fornecedor,
+                unidade=None if pd.isna(unidade) else unidade,
+                quantidade_por_caixa=mapeamento_wireo.get(nome),
+            )
+            self._por_categoria.setdefault(categoria, []).append(nome)
+            self._precos.setdefault(categoria, {})[nome] = float(preco)
+            if nome in mapeamento_wireo:
+                self._por_caixa.setdefault(categoria, {})[nome] = float(mapeamento_wireo[nome])
+        self._por_categoria = {categoria: tuple(sorted(nomes)) for categoria, nomes in self._por_categoria.items()}
+
+    def categorias(self):
+        return sorted(self._por_categoria)
+
+    def itens(self, categoria):
+        return self._por_categoria.get(categoria, ())
+
+    def item(self, categoria, nome):
+        return self._itens.get((categoria, nome))
+
+    def __len__(self):
+        return len(self._itens)
+
+    def precos_de(self, categoria, nomes):
+        """Preços mais recentes de itens de uma categoria (NaN para item desconhecido)."""
+        return pd.Series(nomes, dtype=object).map(self._precos.get(categoria, {})).to_numpy(dtype=float)
+
+    def quantidades_por_caixa(self, categoria, nomes):
+        """Anéis por caixa dos itens (NaN quando o item não está na tabela de WIRE-O)."""
+        return pd.Series(nomes, dtype=object).map(self._por_caixa.get(categoria, {})).to_numpy(dtype=float)
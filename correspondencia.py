@@ -0,0 +1,131 @@
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+# ================== CORRESPONDÊNCIA APROXIMADA DE PAPÉIS ==================
+# O mesmo papel aparece escrito de jeitos diferentes nas tabelas de uso e nas
+# compras ("75G" x "75g/m2", "66 X 96" x "660 X 960", acentos, sufixos). Cada nome
+# vira uma chave estruturada (tipo, gramatura, formato) e o tipo é indexado por
+# trigramas de caracteres: uma busca junta as listas de postagem dos trigramas
+# da consulta com um `bincount` e pontua só os papéis que compartilham algum.
+
+_GRAMATURA = re.compile(r'(\d+)\s*G(?:R|RS)?(?:\s*/?\s*M2|\s*/?\s*M²)?\b', re.IGNORECASE)
+_FORMATO = re.compile(r'(\d+(?:[.,]\d+)?)\s*X\s*(\d+(?:[.,]\d+)?)', re.IGNORECASE)
+_FORMATO_ISO = re.compile(r'\b([AB]\d)\b', re.IGNORECASE)
+_FOLHAS = re.compile(r'\d+\s*(?:FLS|FOLHAS)\b', re.IGNORECASE)
+_NAO_LETRAS = re.compile(r'[^a-z]+')
+
+PESO_TIPO = 0.5
+PESO_GRAMATURA = 0.3
+PESO_FORMATO = 0.2
+SUGESTOES_PADRAO = 3
+
+
+@dataclass(frozen=True)
+class ChavePapel:
+    tipo: str                     # palavras do nome, sem acento, em minúsculas
+    gramatura: Optional[int]      # g/m²
+    formato: Optional[str]        # "66x96" (cm, menor lado primeiro) ou "A4"
+
+
+@dataclass(frozen=True)
+class Correspondencia:
+    papel: str
+    pontuacao: float              # 0 a 1; 1 é o mesmo tipo, gramatura e formato
+
+
+def _sem_acento(texto):
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+
+
+def _medida(texto):
+    return float(texto.replace(',', '.'))
+
+
+def extrair_chave(nome):
+    """(tipo, gramatura, formato) de um nome de papel, tolerante a variações de escrita."""
+    nome = _sem_acento(str(nome))
+    gramatura = _GRAMATURA.search(nome)
+    formato = _FORMATO.search(nome)
+    if formato:
+        lados = sorted((_medida(formato.group(1)), _medida(formato.group(2))))
+        if lados[0] >= 200:  # milímetros (660 X 960) → centímetros
+            lados = [lado / 10 for lado in lados]
+        formato_chave = 'x'.join(f'{lado:g}' for lado in lados)
+    else:
+        iso = _FORMATO_ISO.search(nome)
+        formato_chave = iso.group(1).upper() if iso else None
+
+    resto = _FOLHAS.sub(' ', nome)
+    for encontrado in (gramatura, formato):
+        if encontrado:
+            resto = resto.replace(encontrado.group(0), ' ')
+    if formato_chave and not formato:
+        resto = _FORMATO_ISO.sub(' ', resto)
+    tipo = ' '.join(_NAO_LETRAS.sub(' ', resto.lower()).split())
+    return ChavePapel(tipo, int(gramatura.group(1)) if gramatura else None, formato_chave)
+
+
+def _trigramas(tipo):
+    texto = f'  {tipo} '
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndicePapeis:
+    """Busca aproximada sobre os papéis com compra (ex.: `papeis_unicos`)."""
+
+    def __init__(self, papeis):
+        self.papeis = tuple(papeis)
+        self.chaves = tuple(extrair_chave(papel) for papel in self.papeis)
+
+        postagens = {}
+        for posicao, chave in enumerate(self.chaves):
+            for trigrama in _trigramas(chave.tipo):
+                postagens.setdefault(trigrama, []).append(posicao)
+        self._postagens = {trigrama: np.array(posicoes, dtype=np.intp) for trigrama, posicoes in postagens.items()}
+        self._n_trigramas = np.array([len(_trigramas(chave.tipo)) for chave in self.chaves], dtype=float)
+        self._gramaturas = np.array([np.nan if chave.gramatura is None else chave.gramatura
+                                     for chave in self.chaves], dtype=float)
+        # Formato como código inteiro; -1 = sem formato (nunca casa com a consulta)
+        self._codigos_formato = {}
+        for chave in self.chaves:
+            if chave.formato is not None:
+                self._codigos_formato.setdefault(chave.formato, len(self._codigos_formato))
+        self._formatos = np.array([self._codigos_formato.get(chave.formato, -1) for chave in self.chaves],
+                                  dtype=np.intp)
+
+    def __len__(self):
+        return len(self.papeis)
+
+    def buscar(self, nome, limite=SUGESTOES_PADRAO):
+        """Os `limite` papéis mais parecidos com `nome`, do mais para o menos parecido."""
+        chave = extrair_chave(nome)
+        trigramas = _trigramas(chave.tipo)
+        listas = [self._postagens[t] for t in trigramas if t in self._postagens]
+        if not listas:
+            return ()
+        comuns = np.bincount(np.concatenate(listas), minlength=len(self.papeis))
+        candidatos = np.flatnonzero(comuns)
+
+        # Dice dos trigramas do tipo + proximidade da gramatura + mesmo formato
+        tipo = 2 * comuns[candidatos] / (len(trigramas) + self._n_trigramas[candidatos])
+        gramatura = np.zeros(len(candidatos))
+        if chave.gramatura is not None:
+            g = self._gramaturas[candidatos]
+            diferenca = np.abs(g - chave.gramatura) / np.fmax(g, chave.gramatura)
+            gramatura = np.nan_to_num(1 - np.minimum(diferenca, 1))
+        formato = self._formatos[candidatos] == self._codigos_formato.get(chave.formato, -2)
+        pontuacao = PESO_TIPO * tipo + PESO_GRAMATURA * gramatura + PESO_FORMATO * formato
+
+        melhores = np.argsort(-pontuacao, kind='stable')[:limite]
+        return tuple(Correspondencia(self.papeis[candidatos[i]], round(float(pontuacao[i]), 4))
+                     for i in melhores)
+
+
+def sugerir_para_tabelas(indice, tabelas, limite=SUGESTOES_PADRAO):
+    """{papel: correspondências} para cada papel usado nas tabelas de uso de papel."""
+    papeis = {papel for df in tabelas.values() for papel in df['Papel'].dropna() if papel}
+    return {papel: indice.buscar(papel, limite) for papel in sorted(papeis)}
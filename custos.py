@@ -0,0 +1,212 @@
+import numpy as np
+import pandas as pd
+
+from catalogo import CatalogoCompraDireta
+
+# ================== MOTOR DE CUSTOS (SEM STREAMLIT) ==================
+# Toda a conta do orçamento, vetorizada: cada linha de `configs` é uma configuração
+# de produto e o resultado traz o custo unitário por componente e o total, calculados
+# numa única passada NumPy para todas as linhas.
+#
+# Colunas de `configs` (as ausentes contam como componente não incluído):
+#   quantidade                         quantidade do orçamento (divide o serviço)
+#   <Tipo>                             nome na tabela de uso de papel, PERSONALIZADO ou vazio
+#   <Tipo>_papel, <Tipo>_aproveitamento, <Tipo>_valor_servico   (só para PERSONALIZADO)
+#   CD_<categoria>                     item de compra direta, PERSONALIZADO ou vazio
+#   CD_<categoria>_aproveitamento      (padrão 1.0)
+#   CD_<categoria>_valor_unitario      (só para PERSONALIZADO)
+#   CD_WIRE-O_aneis                    anéis de WIRE-O por unidade (padrão 1)
+# onde <Tipo> é um de COMPONENTES.
+
+PERSONALIZADO = "Personalizado"
+COMPONENTES = ("Miolo", "Bolsa", "Divisoria", "Adesivo")
+PREFIXO_CD = "CD_"
+WIREO = "WIRE-O"
+QUANTIDADE_POR_CAIXA_PADRAO = 6000
+
+_CAMPOS_CD = ('_aproveitamento', '_valor_unitario', '_aneis')
+
+
+# ================== FÓRMULAS ==================
+def custo_componente(preco_papel, quantidade_papel, quantidade_aprovada, valor_impressao, quantidade):
+    """(papel, serviço) por unidade de um componente das tabelas de uso de papel."""
+    quantidade_aprovada = np.where(quantidade_aprovada <= 0, 1, quantidade_aprovada)
+    folhas_por_unidade = quantidade_papel / quantidade_aprovada
+    return preco_papel * folhas_por_unidade, valor_impressao / quantidade
+
+
+def custo_personalizado(preco_papel, aproveitamento, valor_servico, quantidade):
+    """(papel, serviço) por unidade de um componente personalizado."""
+    aproveitamento = np.where(aproveitamento <= 0, 1, aproveitamento)
+    return preco_papel / aproveitamento, valor_servico / quantidade
+
+
+def custo_compra_direta(preco_unitario, aproveitamento):
+    return preco_unitario * aproveitamento
+
+
+def custo_wireo(preco_caixa, quantidade_por_caixa, aneis_por_unidade):
+    # WIRE-O: preço por caixa → anéis por caixa → anéis por produto
+    return preco_caixa / quantidade_por_caixa * aneis_por_unidade
+
+
+# ================== MOTOR ==================
+def _coluna(configs, nome, padrao):
+    if nome in configs:
+        return configs[nome]
+    return pd.Series(padrao, index=configs.index)
+
+
+def _numeros(serie, padrao=np.nan):
+    return pd.to_numeric(serie, errors='coerce').fillna(padrao).to_numpy(dtype=float)
+
+
+def _selecoes(serie):
+    return serie.where(serie.notna(), "").astype(str).str.strip()
+
+
+def _indexar_tabela(df, tipo):
+    tabela = df.dropna(subset=[tipo]).drop_duplicates(subset=[tipo], keep='first').set_index(tipo)
+    # Índice categórico vira nomes simples: o reindex recebe seleções fora das categorias
+    tabela.index = tabela.index.astype(object)
+    return tabela
+
+
+class MotorCustos:
+    """Resolve nomes (componentes, papéis, itens de compra direta) em arrays e calcula.
+
+    `precos_papel` recebe uma sequência de nomes de papel limpos e devolve os preços
+    (NaN quando o papel não tem compra) — por exemplo `IndicePrecos.precos_de`.
+    """
+
+    def __init__(self, tabelas, precos_papel, catalogo=None):
+        # Como no `.iloc[0]` do app: vale a primeira linha de cada nome
+        self.tabelas = {tipo: _indexar_tabela(df, tipo) for tipo, df in tabelas.items()}
+        self.precos_papel = precos_papel
+        self.catalogo = catalogo
+
+    def opcoes(self, tipo):
+        return sorted(self.tabelas[tipo].index)
+
+    def preco_catalogo_cd(self, categoria, nomes):
+        if self.catalogo is None:
+            return np.full(len(nomes), np.nan)
+        return self.catalogo.precos_de(categoria, nomes)
+
+    def orcar(self, configs, precos_papel=None, precos_cd=None):
+        """Custos unitários de cada configuração (uma linha por linha de `configs`).
+
+        `precos_cd(categoria, nomes)` substitui os preços do catálogo de compras
+        diretas (ex.: preço em uma data); NaN marca item sem preço.
+        """
+        precos_papel = precos_papel or self.precos_papel
+        precos_cd = precos_cd or self.preco_catalogo_cd
+        configs = pd.DataFrame(configs).reset_index(drop=True)
+        quantidade = _numeros(_coluna(configs, 'quantidade', np.nan))
+        resultado = {}
+        incompleto = np.zeros(len(configs), dtype=bool)
+        total = np.zeros(len(configs))
+
+        for tipo in COMPONENTES:
+            if tipo not in configs:
+                continue
+            selecao = _selecoes(configs[tipo])
+            incluido = (selecao != "").to_numpy()
+            pers = (selecao == PERSONALIZADO).to_numpy()
+            tabela = self.tabelas.get(tipo)
+
+            # Componente da tabela
+            if tabela is not None:
+                linha = tabela.reindex(selecao.where(incluido & ~pers))
+            else:
+                linha = pd.DataFrame(index=selecao.index, columns=['Papel', 'QuantidadePapel',
+                                                                    'QuantidadeAprovada', 'ValorImpressao'])
+            papel_tabela = linha['Papel'].to_numpy(dtype=object)
+            papel_pers = _selecoes(_coluna(configs, f'{tipo}_papel', "")).to_numpy(dtype=object)
+            papel = np.where(pers, papel_pers, papel_tabela)
+            preco = np.asarray(precos_papel(pd.Series(papel).fillna("").tolist()), dtype=float)
+
+            custo_papel_tab, custo_servico_tab = custo_componente(
+                preco, _numeros(linha['QuantidadePapel']), _numeros(linha['QuantidadeAprovada']),
+                _numeros(linha['ValorImpressao']), quantidade)
+            custo_papel_pers, custo_servico_pers = custo_personalizado(
+                preco, _numeros(_coluna(configs, f'{tipo}_aproveitamento', 1.0), 1.0),
+                _numeros(_coluna(configs, f'{tipo}_valor_servico', 0.0), 0.0), quantidade)
+
+            custo_papel = np.where(pers, custo_papel_pers, custo_papel_tab)
+            custo_servico = np.where(pers, custo_servico_pers, custo_servico_tab)
+            custo = custo_papel + custo_servico
+            custo[~incluido] = np.nan
+
+            resultado[f'{tipo}_papel_usado'] = np.where(incluido, papel, None)
+            resultado[f'{tipo}_custo_papel'] = np.where(incluido, custo_papel, np.nan)
+            resultado[f'{tipo}_custo_servico'] = np.where(incluido, custo_servico, np.nan)
+            resultado[f'{tipo}_custo'] = custo
+            incompleto |= incluido & np.isnan(custo)
+            total += np.nan_to_num(custo)
+
+        for coluna in configs.columns:
+            if not coluna.startswith(PREFIXO_CD) or coluna.endswith(_CAMPOS_CD):
+                continue
+            categoria = coluna[len(PREFIXO_CD):]
+            selecao = _selecoes(configs[coluna])
+            incluido = (selecao != "").to_numpy()
+            pers = (selecao == PERSONALIZADO).to_numpy()
+            aproveitamento = _numeros(_coluna(configs, f'{coluna}_aproveitamento', 1.0), 1.0)
+
+            preco = np.asarray(precos_cd(categoria, selecao.where(incluido & ~pers, "").tolist()), dtype=float)
+            if categoria == WIREO:
+                por_caixa = np.full(len(selecao), np.nan)
+                if self.catalogo is not None:
+                    por_caixa = self.catalogo.quantidades_por_caixa(categoria, selecao.tolist())
+                por_caixa = np.where(np.isnan(por_caixa), QUANTIDADE_POR_CAIXA_PADRAO, por_caixa)
+                aneis = _numeros(_coluna(configs, f'{coluna}_aneis', 1), 1)
+                custo_item = custo_wireo(preco, por_caixa, aneis)
+            else:
+                custo_item = custo_compra_direta(preco, aproveitamento)
+            valor_pers = _numeros(_coluna(configs, f'{coluna}_valor_unitario', 0.0), 0.0)
+            custo = np.where(pers, custo_compra_direta(valor_pers, aproveitamento), custo_item)
+            custo[~incluido] = np.nan
+
+            resultado[f'{coluna}_custo'] = custo
+            incompleto |= incluido & np.isnan(custo)
+            total += np.nan_to_num(custo)
+
+        resultado['total'] = total
+        resultado['incompleto'] = incompleto
+        return pd.DataFrame(resultado)
+
+    def sensibilidade(self, config, quantidades, aproveitamentos=None, campo_aproveitamento=None,
+                      precos_papel=None, precos_cd=None):
+        """Custos de uma configuração em cada ponto da grade quantidade × aproveitamento.
+
+        `campo_aproveitamento` é a coluna de `config` que varia (ex.: 'Miolo_aproveitamento');
+        sem ele a grade é só de quantidades. Todos os pontos saem de um único `orcar`.
+        """
+        quantidades = np.asarray(quantidades, dtype=float)
+        varia_aproveitamento = campo_aproveitamento is not None and aproveitamentos is not None
+        if varia_aproveitamento:
+            q, a = np.meshgrid(quantidades, np.asarray(aproveitamentos, dtype=float), indexing='ij')
+            q, a = q.ravel(), a.ravel()
+        else:
+            q = quantidades
+
+        configs = pd.DataFrame([config]).iloc[np.zeros(len(q), dtype=int)].reset_index(drop=True)
+        configs['quantidade'] = q
+        if varia_aproveitamento:
+            configs[campo_aproveitamento] = a
+        grade = self.orcar(configs, precos_papel, precos_cd)
+        grade.insert(0, 'quantidade', q)
+        if varia_aproveitamento:
+            grade.insert(1, 'aproveitamento', a)
+        return grade
+
+
+def montar_motor_custos(valores):
+    """MotorCustos a partir dos valores de `CarregadorFontes.carregar()`."""
+    tabelas = {'Miolo': valores['miolos'], 'Bolsa': valores['bolsas'],
+               'Divisoria': valores['divisorias'], 'Adesivo': valores['adesivos']}
+    _, _, indice_precos, _ = valores['compras']
+    df_cd, _ = valores['compras_diretas']
+    catalogo = CatalogoCompraDireta(df_cd, valores.get('wireo', {}))
+    return MotorCustos(tabelas, indice_precos.precos_de, catalogo)
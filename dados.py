@@ -0,0 +1,188 @@
+import io
+
+import pandas as pd
+
+from instrumentacao import etapa
+from limpeza import limpar_nomes_cd, limpar_papeis
+from precos import IndicePrecos, MotorPrecos
+
+# ================== LEITURA E LIMPEZA DAS FONTES ==================
+# Funções puras (sem Streamlit). As `ler_*` recebem o conteúdo bruto de um CSV e
+# devolvem o DataFrame já limpo (é o que vai para o snapshot); as de derivação
+# montam, a partir dele, o objeto que o app consome. Rodam nas threads do carregador.
+#
+# O DataFrame limpo guarda só as colunas que o orçamento usa: nomes repetidos como
+# categóricos, quantidades como int32/float32 e valores em R$ como float64 (float32
+# perderia centavos em valores altos). Isso encolhe o snapshot e a memória residente.
+#
+# As planilhas de compras só crescem no fim, então o carregador pode ler apenas as
+# linhas anexadas e juntá-las ao DataFrame limpo anterior com as `juntar_*`, que
+# devolvem o mesmo resultado (linhas, ordem e dtypes) de uma leitura completa.
+
+COLUNAS_COMPRAS = [
+    'Demanda', 'Quantidade', 'DataSolicitacao', 'PrazoDesejado', 'DataAprovacao',
+    'DataEmissaoNF', 'PrevisaoEntrega', 'NumeroNF', 'Fornecedor', 'ValorTotal',
+    'ValorFrete', 'CreditoICMS', 'CNPJ', 'FormaPagamento', 'Parcelas', 'ValorUnitarioStr'
+]
+COLUNAS_MIOLO = ['Miolo', 'Papel', 'QuantidadePapel', 'ValorImpressao', 'UnitImpressao', 'QuantidadeAprovada']
+COLUNAS_BOLSA = ['Bolsa', 'Papel', 'QuantidadePapel', 'ValorImpressao', 'UnitImpressao', 'QuantidadeAprovada']
+COLUNAS_DIVISORIA = ['Divisoria', 'Papel', 'QuantidadePapel', 'ValorImpressao', 'UnitImpressao', 'QuantidadeAprovada']
+COLUNAS_ADESIVO = ['Adesivo', 'Papel', 'QuantidadePapel', 'ValorImpressao', 'UnitImpressao', 'QuantidadeAprovada']
+
+# Colunas mantidas depois da limpeza
+MODELO_COMPRAS = ['PapelLimpo', 'Fornecedor', 'DataEmissaoNF', 'DataEfetiva',
+                  'ValorUnitario', 'Quantidade', 'ValorFrete', 'CreditoICMS']
+MODELO_COMPRAS_DIRETAS = ['CATEGORIA_MATERIAL_PCP', 'NomeLimpo', 'FORNECEDOR', 'UNIDADES', 'DataEfetiva',
+                          'VALOR_UNITARIO', 'QUANTIDADE', 'VALOR_FRETE', 'CREDITO_ICMS']
+CATEGORICAS_COMPRAS = ['PapelLimpo', 'Fornecedor']
+CATEGORICAS_COMPRAS_DIRETAS = ['CATEGORIA_MATERIAL_PCP', 'NomeLimpo', 'FORNECEDOR', 'UNIDADES']
+
+
+def _quantidades(serie):
+    # Inteiros quando dá (int8 a int32), senão float32
+    valores = pd.to_numeric(serie, errors='coerce', downcast='integer')
+    return valores if valores.dtype.kind in 'iu' else valores.astype('float32')
+
+
+def _compactar(df, colunas, categoricas=(), quantidades=(), valores=()):
+    df = df.reindex(columns=colunas)
+    for coluna in categoricas:
+        df[coluna] = df[coluna].astype('category')
+    for coluna in quantidades:
+        df[coluna] = _quantidades(df[coluna])
+    for coluna in valores:
+        df[coluna] = pd.to_numeric(df[coluna], errors='coerce').astype('float64')
+    return df.reset_index(drop=True)
+
+
+def _juntar(antigo, novo, categoricas=(), quantidades=()):
+    # Mesmas categorias dos dois lados, senão o concat converte a coluna para texto;
+    # as cópias rasas não tocam `antigo`, que pode estar em uso por outras sessões
+    antigo, novo = antigo.copy(deep=False), novo.copy(deep=False)
+    for coluna in categoricas:
+        categorias = antigo[coluna].cat.categories.union(novo[coluna].cat.categories)
+        antigo[coluna] = antigo[coluna].cat.set_categories(categorias)
+        novo[coluna] = novo[coluna].cat.set_categories(categorias)
+    juntado = pd.concat([antigo, novo], ignore_index=True)
+    for coluna in quantidades:
+        juntado[coluna] = _quantidades(juntado[coluna])
+    return juntado
+
+
+def _mais_recentes_primeiro(df_compras):
+    # Mesma regra do MotorPrecos e do catálogo: mais recente = maior DataEfetiva e, no
+    # mesmo dia, a linha mais abaixo no arquivo. `df_compras` chega com as linhas mais
+    # abaixo primeiro; a ordenação estável preserva isso nos empates.
+    return df_compras.sort_values('DataEfetiva', ascending=False, kind='stable')
+
+
+def ler_compras(conteudo):
+    with etapa('compras.read_csv'):
+        df_compras = pd.read_csv(io.BytesIO(conteudo), encoding='utf-8')
+    df_compras.columns = COLUNAS_COMPRAS
+
+    # Converter datas
+    date_cols = ['DataSolicitacao', 'PrazoDesejado', 'DataAprovacao', 'DataEmissaoNF', 'PrevisaoEntrega']
+    with etapa('compras.datas'):
+        for col in date_cols:
+            df_compras[col] = pd.to_datetime(df_compras[col], format='%d/%m/%Y', errors='coerce')
+
+    # Converter valor unitário
+    df_compras['ValorUnitario'] = (df_compras['ValorUnitarioStr']
+                                   .astype(str)
+                                   .str.replace('R\\$', '', regex=True)
+                                   .str.replace(',', '.')
+                                   .str.strip())
+    df_compras['ValorUnitario'] = pd.to_numeric(df_compras['ValorUnitario'], errors='coerce')
+
+    # Limpar nome do papel
+    with etapa('compras.limpeza'):
+        df_compras['PapelLimpo'] = limpar_papeis(df_compras['Demanda'])
+    df_compras = df_compras.dropna(subset=['ValorUnitario', 'PapelLimpo'])
+    df_compras = df_compras[df_compras['PapelLimpo'] != ""]
+    # Data da compra para os preços: emissão da NF, senão aprovação, senão solicitação
+    df_compras['DataEfetiva'] = (df_compras['DataEmissaoNF']
+                                 .fillna(df_compras['DataAprovacao'])
+                                 .fillna(df_compras['DataSolicitacao']))
+    df_compras = _mais_recentes_primeiro(df_compras.iloc[::-1])
+    with etapa('compras.compactar'):
+        return _compactar(df_compras, MODELO_COMPRAS, categoricas=CATEGORICAS_COMPRAS,
+                          quantidades=['Quantidade'], valores=['ValorUnitario', 'ValorFrete', 'CreditoICMS'])
+
+
+def juntar_compras(df_compras, df_novas):
+    """`df_compras` com as compras de `df_novas` (linhas anexadas ao CSV, já limpas)."""
+    with etapa('compras.juntar'):
+        # As linhas anexadas vêm depois no arquivo: no empate de data, passam à frente
+        juntado = _juntar(df_novas, df_compras, CATEGORICAS_COMPRAS, ['Quantidade'])
+        return _mais_recentes_primeiro(juntado).reset_index(drop=True)
+
+
+def derivar_compras(df_compras):
+    papeis_unicos = tuple(sorted(df_compras['PapelLimpo'].cat.categories))
+    return df_compras, papeis_unicos, IndicePrecos(df_compras), MotorPrecos.de_compras(df_compras)
+
+
+def derivar_compras_anexadas(anterior, df_compras, df_novas):
+    # Mesmo resultado de derivar_compras(df_compras), recalculando só o que df_novas muda
+    _, _, indice, motor = anterior
+    papeis_unicos = tuple(sorted(df_compras['PapelLimpo'].cat.categories))
+    return df_compras, papeis_unicos, indice.juntar(df_novas), motor.juntar_compras(df_novas)
+
+
+def ler_componente(colunas):
+    def ler(conteudo):
+        with etapa('componentes.read_csv'):
+            df = pd.read_csv(io.BytesIO(conteudo), encoding='utf-8')
+        df.columns = colunas
+        with etapa('componentes.limpeza'):
+            df['Papel'] = limpar_papeis(df['Papel'])
+        return _compactar(df, colunas, categoricas=[colunas[0], 'Papel'],
+                          quantidades=['QuantidadePapel', 'QuantidadeAprovada'],
+                          valores=['ValorImpressao', 'UnitImpressao'])
+    return ler
+
+
+def ler_compras_diretas(conteudo):
+    with etapa('compras_diretas.read_csv'):
+        df_cd = pd.read_csv(io.BytesIO(conteudo), encoding='utf-8')
+    if 'CATEGORIA_MATERIAL_PCP' not in df_cd.columns:
+        raise ValueError("Coluna 'CATEGORIA_MATERIAL_PCP' não encontrada.")
+
+    df_cd = df_cd.dropna(subset=['CATEGORIA_MATERIAL_PCP', 'VALOR_UNITARIO'])
+    df_cd['VALOR_UNITARIO'] = pd.to_numeric(df_cd['VALOR_UNITARIO'], errors='coerce')
+    df_cd = df_cd.dropna(subset=['VALOR_UNITARIO'])
+
+    # Extrair nome limpo
+    with etapa('compras_diretas.limpeza'):
+        df_cd['NomeLimpo'] = limpar_nomes_cd(df_cd['DEMANDA'])
+
+    def data(coluna):
+        if coluna not in df_cd:
+            return pd.Series(pd.NaT, index=df_cd.index)
+        return pd.to_datetime(df_cd[coluna], format='%Y-%m-%d', errors='coerce')
+    with etapa('compras_diretas.datas'):
+        df_cd['DataEfetiva'] = data('DATA_EMISSAO_NF').fillna(data('DATA_APROVAÇÃO')).fillna(data('DATA_SOLICITAÇÃO'))
+    return _compactar(df_cd, MODELO_COMPRAS_DIRETAS, categoricas=CATEGORICAS_COMPRAS_DIRETAS,
+                      quantidades=['QUANTIDADE'], valores=['VALOR_UNITARIO', 'VALOR_FRETE', 'CREDITO_ICMS'])
+
+
+def juntar_compras_diretas(df_cd, df_novas):
+    return _juntar(df_cd, df_novas, CATEGORICAS_COMPRAS_DIRETAS, ['QUANTIDADE'])
+
+
+def derivar_compras_diretas(df_cd):
+    # O catálogo (catalogo.py) é montado junto com a tabela de WIRE-O, que é outra fonte
+    return df_cd, MotorPrecos.de_compras_diretas(df_cd)
+
+
+def derivar_compras_diretas_anexadas(anterior, df_cd, df_novas):
+    _, motor = anterior
+    return df_cd, motor.juntar_compras_diretas(df_novas)
+
+
+def ler_wireo(conteudo):
+    df_wireo = pd.read_csv(io.BytesIO(conteudo), encoding='utf-8')
+    df_wireo.columns = ['WIREO', 'QUANTIDADE_POR_CAIXA']
+    df_wireo['WIREO'] = df_wireo['WIREO'].astype(str).str.strip()
+    return df_wireo
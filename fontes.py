@@ -0,0 +1,247 @@
+import hashlib
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import dados
+from catalogo import mapear_wireo
+from instrumentacao import contar, etapa
+
+# ================== URLs dos CSVs no GitHub ==================
+# ORCAMENTO_BASE_URL permite apontar para um servidor local (ex.: `python -m http.server`
+# na raiz do repositório) e testar o carregamento sem acessar o GitHub.
+BASE_URL = os.environ.get(
+    "ORCAMENTO_BASE_URL", "https://raw.githubusercontent.com/K1NGOD-RJ/projeto_orcamento/main"
+).rstrip("/")
+
+ARQUIVO_COMPRAS = "compradepapel.csv"
+ARQUIVO_USO_PAPEL_MIOLO = "usodepapelmiolos.csv"
+ARQUIVO_USO_PAPEL_BOLSA = "usodepapelbolsa.csv"
+ARQUIVO_USO_PAPEL_DIVISORIA = "usodepapeldivisoria.csv"
+ARQUIVO_USO_PAPEL_ADESIVO = "usodepapeladesivo.csv"
+ARQUIVO_COMPRA_DIRETA = "compradiretav2.csv"
+ARQUIVO_TABELA_WIREO = "tabelawireo.csv"
+
+TTL_PADRAO = 600  # segundos até revalidar uma fonte no servidor
+TIMEOUT = 15
+
+
+@dataclass(frozen=True)
+class Fonte:
+    nome: str
+    arquivo: str
+    ler: Callable[[bytes], Any]
+    derivar: Optional[Callable[[Any], Any]] = None
+    ttl: float = TTL_PADRAO
+    # Só para CSVs que crescem apenas no fim: junta o DataFrame limpo anterior com
+    # o das linhas anexadas, então uma atualização só parseia/limpa o que é novo
+    juntar: Optional[Callable[[Any, Any], Any]] = None
+    # Idem para o derivado: (valor anterior, DataFrame juntado, linhas anexadas) → valor,
+    # sem recalcular sobre o histórico inteiro
+    derivar_anexo: Optional[Callable[[Any, Any, Any], Any]] = None
+
+    def montar(self, df, anterior=None, novas=None):
+        if not self.derivar:
+            return df
+        with etapa(f"{self.nome}.derivar"):
+            if novas is not None and self.derivar_anexo:
+                return self.derivar_anexo(anterior, df, novas)
+            return self.derivar(df)
+
+
+FONTES = [
+    Fonte("compras", ARQUIVO_COMPRAS, dados.ler_compras, dados.derivar_compras, juntar=dados.juntar_compras,
+          derivar_anexo=dados.derivar_compras_anexadas),
+    Fonte("miolos", ARQUIVO_USO_PAPEL_MIOLO, dados.ler_componente(dados.COLUNAS_MIOLO)),
+    Fonte("bolsas", ARQUIVO_USO_PAPEL_BOLSA, dados.ler_componente(dados.COLUNAS_BOLSA)),
+    Fonte("divisorias", ARQUIVO_USO_PAPEL_DIVISORIA, dados.ler_componente(dados.COLUNAS_DIVISORIA)),
+    Fonte("adesivos", ARQUIVO_USO_PAPEL_ADESIVO, dados.ler_componente(dados.COLUNAS_ADESIVO)),
+    Fonte("compras_diretas", ARQUIVO_COMPRA_DIRETA, dados.ler_compras_diretas, dados.derivar_compras_diretas,
+          juntar=dados.juntar_compras_diretas, derivar_anexo=dados.derivar_compras_diretas_anexadas),
+    # A tabela de WIRE-O muda raramente
+    Fonte("wireo", ARQUIVO_TABELA_WIREO, dados.ler_wireo, mapear_wireo, ttl=6 * TTL_PADRAO),
+]
+
+
+@dataclass
+class _Entrada:
+    valor: Any
+    hash: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    verificado_em: float
+    df: Any = None                  # DataFrame limpo (fontes com `juntar`)
+    tamanho: Optional[int] = None   # bytes do CSV já processados; `hash` é o desse prefixo
+
+
+def _linhas_anexadas(conteudo, entrada):
+    """Cabeçalho + linhas anexadas desde a última leitura, ou None se não for só um anexo."""
+    tamanho = entrada.tamanho
+    if entrada.df is None or not tamanho or len(conteudo) <= tamanho:
+        return None
+    prefixo, resto = conteudo[:tamanho], conteudo[tamanho:]
+    # A última linha antiga não pode ter sido estendida pelo anexo
+    if not (prefixo.endswith(b"\n") or resto.startswith((b"\n", b"\r\n"))):
+        return None
+    fim_cabecalho = prefixo.find(b"\n")
+    if fim_cabecalho < 0 or hashlib.sha256(prefixo).hexdigest() != entrada.hash:
+        return None
+    return prefixo[:fim_cabecalho + 1] + resto
+
+
+class CarregadorFontes:
+    """Mantém uma entrada de cache por fonte e busca as fontes vencidas em paralelo.
+
+    Cada fonte tem seu próprio TTL. Vencido o TTL, a fonte é revalidada com GET
+    condicional (If-None-Match / If-Modified-Since); um 304, ou um conteúdo com o
+    mesmo hash, reaproveita o objeto já processado sem baixar/parsear de novo.
+    Se a busca falhar e já houver um valor em cache, o valor antigo é mantido.
+
+    Com um `snapshot.Snapshot`, o cache começa preenchido pelos DataFrames limpos
+    gravados em disco e cada fonte re-ingerida é gravada de volta nele.
+
+    Fontes com `juntar` são ingeridas de forma incremental: se o conteúdo novo começa
+    exatamente pelos bytes já processados (mesmo hash do prefixo), só as linhas
+    anexadas são lidas e juntadas ao DataFrame anterior (e, com `derivar_anexo`, ao
+    valor derivado anterior); qualquer edição no meio do arquivo cai na leitura completa.
+    """
+
+    def __init__(self, fontes=FONTES, base_url=BASE_URL, timeout=TIMEOUT, snapshot=None):
+        self.fontes = {f.nome: f for f in fontes}
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._cache = {}
+        self._locks = {nome: threading.Lock() for nome in self.fontes}
+        self._lock_stats = threading.Lock()
+        self.estatisticas = {"hits": 0, "downloads": 0, "nao_modificados": 0, "falhas": 0, "snapshot": 0,
+                             "incrementais": 0}
+        self.snapshot = snapshot
+        if snapshot is not None:
+            self._semear_do_snapshot()
+
+    def _semear_do_snapshot(self):
+        agora, agora_relogio = time.monotonic(), time.time()
+        for nome, fonte in self.fontes.items():
+            with etapa(f"{nome}.snapshot"):
+                salvo = self.snapshot.carregar(nome)
+            if salvo is None:
+                continue
+            df, meta = salvo
+            try:
+                valor = fonte.montar(df)
+            except Exception:
+                continue
+            # A idade do snapshot conta para o TTL: um snapshot antigo é revalidado logo
+            idade = max(0.0, agora_relogio - meta.get("ingerido_em", 0.0))
+            self._cache[nome] = _Entrada(valor, meta["hash"], meta.get("etag"),
+                                         meta.get("last_modified"), agora - idade,
+                                         df if fonte.juntar else None, meta.get("tamanho"))
+            self._contar("snapshot")
+
+    def url(self, nome):
+        return f"{self.base_url}/{self.fontes[nome].arquivo}"
+
+    def carregar(self, forcar=False):
+        """Retorna ({nome: valor}, {nome: exceção}, {nome: hash}) para todas as fontes.
+
+        Os hashes são os das entradas efetivamente devolvidas em `valores` (lidos junto
+        com o valor, sob o lock da fonte): servem de chave de cache mesmo que outra
+        thread atualize a fonte logo depois.
+        """
+        agora = time.monotonic()
+        vencidas = [nome for nome, fonte in self.fontes.items()
+                    if forcar or not self._fresca(nome, fonte, agora)]
+
+        futuros = {}
+        if len(vencidas) > 1:
+            with ThreadPoolExecutor(max_workers=len(vencidas)) as executor:
+                futuros = {nome: executor.submit(self._obter, nome, forcar) for nome in vencidas}
+        valores, erros, versoes = {}, {}, {}
+        for nome in self.fontes:
+            try:
+                if nome in futuros:
+                    valores[nome], versoes[nome] = futuros[nome].result()
+                else:
+                    valores[nome], versoes[nome] = self._obter(nome, forcar)
+            except Exception as e:
+                erros[nome] = e
+        return valores, erros, versoes
+
+    def _fresca(self, nome, fonte, agora):
+        entrada = self._cache.get(nome)
+        return entrada is not None and agora - entrada.verificado_em < fonte.ttl
+
+    def _contar(self, chave):
+        with self._lock_stats:
+            self.estatisticas[chave] += 1
+        contar(f"fontes.{chave}")
+
+    def _obter(self, nome, forcar):
+        """(valor, hash) da fonte."""
+        fonte = self.fontes[nome]
+        with self._locks[nome]:
+            agora = time.monotonic()
+            entrada = self._cache.get(nome)
+            if not forcar and self._fresca(nome, fonte, agora):
+                self._contar("hits")
+                return entrada.valor, entrada.hash
+
+            requisicao = urllib.request.Request(self.url(nome))
+            if entrada is not None:
+                if entrada.etag:
+                    requisicao.add_header("If-None-Match", entrada.etag)
+                if entrada.last_modified:
+                    requisicao.add_header("If-Modified-Since", entrada.last_modified)
+
+            try:
+                with etapa(f"{nome}.download"):
+                    with urllib.request.urlopen(requisicao, timeout=self.timeout) as resposta:
+                        conteudo = resposta.read()
+                        etag = resposta.headers.get("ETag")
+                        last_modified = resposta.headers.get("Last-Modified")
+            except urllib.error.HTTPError as e:
+                if e.code == 304 and entrada is not None:
+                    self._contar("nao_modificados")
+                    entrada.verificado_em = agora
+                    return entrada.valor, entrada.hash
+                return self._falhou(entrada, agora, e)
+            except (urllib.error.URLError, OSError) as e:
+                return self._falhou(entrada, agora, e)
+
+            self._contar("downloads")
+            digest = hashlib.sha256(conteudo).hexdigest()
+            if entrada is not None and entrada.hash == digest:
+                valor, df = entrada.valor, entrada.df
+            else:
+                df, novas = self._ler(fonte, conteudo, entrada)
+                if self.snapshot is not None:
+                    try:
+                        self.snapshot.salvar(nome, df, digest, etag, last_modified, len(conteudo))
+                    except Exception:
+                        pass  # sem snapshot o app continua funcionando, só não acelera o próximo start
+                valor = fonte.montar(df, entrada and entrada.valor, novas)
+            self._cache[nome] = _Entrada(valor, digest, etag, last_modified, agora,
+                                         df if fonte.juntar else None, len(conteudo))
+            return valor, digest
+
+    def _ler(self, fonte, conteudo, entrada):
+        if fonte.juntar is not None and entrada is not None:
+            anexadas = _linhas_anexadas(conteudo, entrada)
+            if anexadas is not None:
+                self._contar("incrementais")
+                novas = fonte.ler(anexadas)
+                return fonte.juntar(entrada.df, novas), novas
+        return fonte.ler(conteudo), None
+
+    def _falhou(self, entrada, agora, erro):
+        self._contar("falhas")
+        if entrada is None:
+            raise erro
+        # Mantém o valor antigo e só tenta de novo quando o TTL vencer outra vez
+        entrada.verificado_em = agora
+        return entrada.valor, entrada.hash
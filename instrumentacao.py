@@ -0,0 +1,171 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+# ================== INSTRUMENTAÇÃO ==================
+# Cronômetros e contadores por etapa (download, read_csv, datas, limpeza, montagem
+# dos índices, seções de cada rerun) num registro único por processo, exportável em
+# JSON ou no formato texto do Prometheus. Desligado, `etapa()` devolve sempre o
+# mesmo `nullcontext` e `contar()` retorna na primeira linha: o custo é uma chamada
+# de função. Liga com ORCAMENTO_INSTRUMENTACAO=1 ou pelo painel de depuração do app.
+
+_NULO = nullcontext()
+
+
+class _Cronometro:
+    __slots__ = ('registro', 'nome', 'inicio')
+
+    def __init__(self, registro, nome):
+        self.registro = registro
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self.registro.registrar(self.nome, time.perf_counter() - self.inicio)
+        return False
+
+
+class Registro:
+    def __init__(self, ativo=False):
+        self.ativo = ativo
+        self._lock = threading.Lock()
+        self.zerar()
+
+    def zerar(self):
+        with self._lock:
+            self.etapas = {}     # nome -> {'execucoes', 'total_s', 'max_s', 'ultima_s'}
+            self.contadores = {}
+            self.desde = time.time()
+
+    def etapa(self, nome):
+        """Context manager que cronometra `nome` (no-op quando desligado)."""
+        if not self.ativo:
+            return _NULO
+        return _Cronometro(self, nome)
+
+    def registrar(self, nome, segundos):
+        with self._lock:
+            etapa = self.etapas.get(nome)
+            if etapa is None:
+                etapa = self.etapas[nome] = {'execucoes': 0, 'total_s': 0.0, 'max_s': 0.0, 'ultima_s': 0.0}
+            etapa['execucoes'] += 1
+            etapa['total_s'] += segundos
+            etapa['max_s'] = max(etapa['max_s'], segundos)
+            etapa['ultima_s'] = segundos
+
+    def contar(self, nome, n=1):
+        if not self.ativo:
+            return
+        with self._lock:
+            self.contadores[nome] = self.contadores.get(nome, 0) + n
+
+    def secoes(self, prefixo):
+        return Secoes(self, prefixo)
+
+    def cronometrar(self, nome):
+        """Decorador: cronometra cada chamada da função como a etapa `nome`."""
+        def decorador(funcao):
+            @functools.wraps(funcao)
+            def envolvida(*args, **kwargs):
+                with self.etapa(nome):
+                    return funcao(*args, **kwargs)
+            return envolvida
+        return decorador
+
+    def dados(self):
+        with self._lock:
+            return {'desde': self.desde,
+                    'etapas': {nome: dict(etapa) for nome, etapa in sorted(self.etapas.items())},
+                    'contadores': dict(sorted(self.contadores.items()))}
+
+    def exportar_json(self):
+        return json.dumps(self.dados(), indent=2, ensure_ascii=False)
+
+    def exportar_prometheus(self, prefixo='orcamento'):
+        dados = self.dados()
+        linhas = []
+
+        def metrica(nome, tipo, ajuda, valores, rotulo):
+            linhas.append(f'# HELP {prefixo}_{nome} {ajuda}')
+            linhas.append(f'# TYPE {prefixo}_{nome} {tipo}')
+            for chave, valor in valores:
+                chave = chave.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+                linhas.append(f'{prefixo}_{nome}{{{rotulo}="{chave}"}} {valor:g}')
+
+        etapas = dados['etapas'].items()
+        metrica('etapa_execucoes_total', 'counter', 'Execuções de cada etapa.',
+                [(n, e['execucoes']) for n, e in etapas], 'etapa')
+        metrica('etapa_segundos_total', 'counter', 'Tempo acumulado em cada etapa.',
+                [(n, e['total_s']) for n, e in etapas], 'etapa')
+        metrica('etapa_segundos_max', 'gauge', 'Maior duração de uma execução da etapa.',
+                [(n, e['max_s']) for n, e in etapas], 'etapa')
+        metrica('contador_total', 'counter', 'Contadores (cache, carregador).',
+                dados['contadores'].items(), 'nome')
+        return '\n'.join(linhas) + '\n'
+
+
+class Secoes:
+    """Trechos consecutivos de um script: cada `marcar(nome)` fecha o trecho anterior.
+
+    Evita reindentar o script inteiro em blocos `with`; o total vai em `<prefixo>.total`.
+    """
+
+    def __init__(self, registro, prefixo):
+        self.registro = registro
+        self.prefixo = prefixo
+        self.atual = None
+        self.inicio = self.comeco = time.perf_counter()
+
+    def marcar(self, nome):
+        if not self.registro.ativo:
+            return
+        agora = time.perf_counter()
+        if self.atual is not None:
+            self.registro.registrar(f'{self.prefixo}.{self.atual}', agora - self.inicio)
+        self.atual, self.inicio = nome, agora
+
+    def encerrar(self):
+        self.marcar(None)
+        if self.registro.ativo:
+            self.registro.registrar(f'{self.prefixo}.total', time.perf_counter() - self.comeco)
+
+
+REGISTRO = Registro(ativo=os.environ.get('ORCAMENTO_INSTRUMENTACAO') == '1')
+etapa = REGISTRO.etapa
+contar = REGISTRO.contar
+cronometrar = REGISTRO.cronometrar
+
+
+# ================== PERFIL DE UM RERUN ==================
+def iniciar_perfil():
+    """Começa a perfilar; usa pyinstrument se estiver instalado, senão cProfile."""
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        import cProfile
+        perfil = cProfile.Profile()
+        perfil.enable()
+    else:
+        perfil = Profiler()
+        perfil.start()
+    return perfil
+
+
+def encerrar_perfil(perfil, linhas=40):
+    """Para o perfil e devolve o relatório em texto."""
+    if hasattr(perfil, 'output_text'):
+        perfil.stop()
+        return perfil.output_text(unicode=True)
+    import io
+    import pstats
+
+    perfil.disable()
+    saida = io.StringIO()
+    pstats.Stats(perfil, stream=saida).sort_stats('cumulative').print_stats(linhas)
+    return saida.getvalue()
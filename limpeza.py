@@ -0,0 +1,89 @@
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+# ================== CANONICALIZAÇÃO DE NOMES ==================
+# Os nomes brutos se repetem muito (o mesmo papel é comprado todo mês), então a
+# limpeza roda uma única vez por nome distinto, com regex pré-compiladas e
+# operações `.str` vetorizadas, e o resultado é espalhado de volta pelos códigos
+# do `pd.factorize`. Nomes já vistos ficam memorizados entre chamadas.
+
+_PREFIXO_PAPEL = re.compile(r'^(MP\d{3}|COUCHE|CARTAO|PAPEL|20\d{3}|COLOR|SCRITURA|Papel|Cartão)\s*', re.IGNORECASE)
+_SUFIXO_UNICA = re.compile(r'\s*UNICA-\w+')
+_SEM_LINER = re.compile(r'\s*-\s*SEM\s*LINER', re.IGNORECASE)
+_CHAMBRIL = re.compile(r'\s*-\s*CHAMBRIL', re.IGNORECASE)
+_ESPACOS = re.compile(r'\s+')
+
+_PREFIXO_CD = re.compile(r'^MP\d{3}\s*')
+# "…MMUNICA-U" perde o sufixo; "…PRETAUNICA-7/8" vira "…PRETA 7/8" (a bitola distingue o item)
+_SUFIXO_UNICA_CD = re.compile(r'\s*UNICA-(?:U\b)?')
+
+_LIMITE_MEMO = 200_000
+
+
+def limpar_papel(nome):
+    if pd.isna(nome):
+        return ""
+    nome = _PREFIXO_PAPEL.sub('', str(nome))
+    nome = _SUFIXO_UNICA.sub('', nome)
+    nome = _SEM_LINER.sub('', nome)
+    nome = _CHAMBRIL.sub('', nome)
+    nome = _ESPACOS.sub(' ', nome).strip()
+    return nome.title()
+
+
+def limpar_nome_cd(nome):
+    nome = _PREFIXO_CD.sub('', str(nome))
+    return _SUFIXO_UNICA_CD.sub(' ', nome).strip()
+
+
+def _limpar_papeis_unicos(nomes):
+    return (nomes
+            .str.replace(_PREFIXO_PAPEL, '', regex=True)
+            .str.replace(_SUFIXO_UNICA, '', regex=True)
+            .str.replace(_SEM_LINER, '', regex=True)
+            .str.replace(_CHAMBRIL, '', regex=True)
+            .str.replace(_ESPACOS, ' ', regex=True)
+            .str.strip()
+            .str.title())
+
+
+def _limpar_nomes_cd_unicos(nomes):
+    return (nomes
+            .str.replace(_PREFIXO_CD, '', regex=True)
+            .str.replace(_SUFIXO_UNICA_CD, ' ', regex=True)
+            .str.strip())
+
+
+class _Canonicalizador:
+    def __init__(self, limpar_unicos, valor_na):
+        self._limpar_unicos = limpar_unicos
+        self._valor_na = valor_na
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, serie):
+        codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+        brutos = [str(nome) for nome in unicos]
+
+        with self._lock:
+            conhecidos = {nome: self._memo[nome] for nome in brutos if nome in self._memo}
+        novos = [nome for nome in brutos if nome not in conhecidos]
+        if novos:
+            limpos = dict(zip(novos, self._limpar_unicos(pd.Series(novos, dtype=object)).tolist()))
+            conhecidos.update(limpos)
+            with self._lock:
+                if len(self._memo) + len(limpos) > _LIMITE_MEMO:
+                    self._memo.clear()
+                self._memo.update(limpos)
+
+        # A última posição atende o código -1 (valores ausentes) do factorize
+        valores = np.array([conhecidos[nome] for nome in brutos] + [self._valor_na], dtype=object)
+        return pd.Series(valores[codigos], index=serie.index, name=serie.name)
+
+
+# limpar_papel(NaN) == "", enquanto a limpeza das compras diretas aplica str() e vira "nan"
+limpar_papeis = _Canonicalizador(_limpar_papeis_unicos, "")
+limpar_nomes_cd = _Canonicalizador(_limpar_nomes_cd_unicos, limpar_nome_cd(float('nan')))
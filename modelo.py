@@ -0,0 +1,87 @@
+from dataclasses import dataclass, fields
+from types import MappingProxyType
+
+from catalogo import CatalogoCompraDireta
+from correspondencia import IndicePapeis, sugerir_para_tabelas
+from custos import MotorCustos, montar_motor_custos
+from fontes import BASE_URL, CarregadorFontes
+from instrumentacao import etapa
+from precos import IndicePrecos, MotorPrecos
+
+# ================== MODELO DE DADOS COMPARTILHADO ==================
+# Tudo o que o orçamento consulta, montado uma vez por versão das fontes e
+# compartilhado por referência entre sessões (`st.cache_resource` no app, um por
+# processo no lote), então é só para leitura. A dataclass é congelada e os arrays
+# NumPy dos motores de preço são somente leitura, mas as tabelas de uso de papel
+# (`MotorCustos.tabelas`, DataFrames) e os dicionários internos do catálogo e do
+# índice de preços não são protegidos: quem alterar um deles altera para todas as
+# sessões. Os DataFrames das compras não ficam aqui; só os índices derivados deles.
+
+
+@dataclass(frozen=True)
+class DadosOrcamento:
+    versoes: tuple               # ((fonte, hash), ...) — chave dos caches do app
+    papeis_unicos: tuple         # papéis limpos com compra, em ordem alfabética
+    indice_precos: IndicePrecos
+    motor_papel: MotorPrecos
+    motor_cd: MotorPrecos
+    motor_custos: MotorCustos
+    indice_papeis: IndicePapeis
+    sugestoes_papel: MappingProxyType  # papel das tabelas de uso → correspondências, pré-calculadas
+
+    @property
+    def catalogo_cd(self) -> CatalogoCompraDireta:
+        return self.motor_custos.catalogo
+
+    def sugerir_papeis(self, papel):
+        """Papéis com compra mais parecidos com `papel` (pré-calculado para as tabelas de uso)."""
+        sugestoes = self.sugestoes_papel.get(papel)
+        return sugestoes if sugestoes is not None else self.indice_papeis.buscar(papel)
+
+    def __reduce__(self):
+        # MappingProxyType não é serializável: vai como dict e volta como proxy
+        # (o orcar_lote envia o modelo pronto aos processos do pool)
+        campos = {campo.name: getattr(self, campo.name) for campo in fields(self)}
+        campos['sugestoes_papel'] = dict(self.sugestoes_papel)
+        return _restaurar_dados, (campos,)
+
+
+def _restaurar_dados(campos):
+    return DadosOrcamento(**{**campos, 'sugestoes_papel': MappingProxyType(campos['sugestoes_papel'])})
+
+
+def montar_dados(valores, versoes=()):
+    """DadosOrcamento a partir dos valores de `CarregadorFontes.carregar()`."""
+    _, papeis_unicos, indice_precos, motor_papel = valores['compras']
+    _, motor_cd = valores['compras_diretas']
+    with etapa('modelo.motor_custos'):  # inclui o catálogo de compras diretas
+        motor_custos = montar_motor_custos(valores)
+    with etapa('modelo.correspondencia_papeis'):
+        indice_papeis = IndicePapeis(papeis_unicos)
+        sugestoes_papel = MappingProxyType(sugerir_para_tabelas(indice_papeis, motor_custos.tabelas))
+    return DadosOrcamento(
+        versoes=tuple(versoes),
+        papeis_unicos=tuple(papeis_unicos),
+        indice_precos=indice_precos,
+        motor_papel=motor_papel,
+        motor_cd=motor_cd,
+        motor_custos=motor_custos,
+        indice_papeis=indice_papeis,
+        sugestoes_papel=sugestoes_papel,
+    )
+
+
+def carregar_modelo(base_url=BASE_URL, snapshot=None):
+    """Carrega as fontes e monta o DadosOrcamento (para scripts, fora do app).
+
+    Sem a tabela de WIRE-O vale o padrão de anéis por caixa; qualquer outra fonte
+    indisponível levanta RuntimeError.
+    """
+    valores, erros, versoes = CarregadorFontes(base_url=base_url, snapshot=snapshot).carregar()
+    if 'wireo' in erros:
+        valores['wireo'] = {}
+        del erros['wireo']
+    if erros:
+        nome, e = next(iter(erros.items()))
+        raise RuntimeError(f"Erro ao carregar os dados ({nome}): {e}")
+    return montar_dados(valores, tuple(sorted(versoes.items())))
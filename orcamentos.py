@@ -0,0 +1,245 @@
+"""Orçamentos salvos (SQLite) e reprecificação em lote.
+
+Uso:
+    python orcamentos.py listar [--status aberto] [--limite 50]
+    python orcamentos.py reprecificar [--status aberto] [--saida deltas.csv] [--sem-gravar]
+
+Cada orçamento guarda a configuração completa no formato de `custos.MotorCustos.orcar`
+(componentes ou papel/aproveitamento/valor do serviço personalizados, itens de compra
+direta, anéis de WIRE-O por unidade e a quantidade), a base de preço e o total unitário
+no momento em que foi salvo (marcado como incompleto se algum componente estava sem
+preço e ficou fora do total). A reprecificação lê todos os orçamentos de um status,
+recalcula todos de uma vez com `orcar` sobre os preços atuais e informa a diferença
+para o total salvo — delta positivo é orçamento que ficou abaixo do custo. Orçamentos
+incompletos, ao salvar ou agora, ficam sem delta: os totais não são comparáveis.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from precos import ULTIMO, funcoes_de_preco
+
+ABERTO = 'aberto'
+CAMINHO_PADRAO = os.environ.get(
+    "ORCAMENTO_BANCO", os.path.join(os.path.dirname(os.path.abspath(__file__)), "orcamentos.sqlite3")
+)
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS orcamentos (
+    id                  INTEGER PRIMARY KEY,
+    nome                TEXT NOT NULL,
+    status              TEXT NOT NULL DEFAULT 'aberto',
+    criado_em           TEXT NOT NULL,
+    quantidade          REAL NOT NULL,
+    config              TEXT NOT NULL,  -- JSON no formato de MotorCustos.orcar
+    base_preco          TEXT,           -- JSON [metodo, data ISO ou null, custo_posto]
+    versoes             TEXT,           -- JSON das versões (hashes) das fontes ao salvar
+    total               REAL,
+    incompleto          INTEGER NOT NULL DEFAULT 0,  -- algum componente sem preço ao salvar
+    total_atual         REAL,           -- última reprecificação
+    reprecificado_em    TEXT
+);
+-- Listagem (mais recentes primeiro, com ou sem filtro de status) e seleção para a
+-- reprecificação saem direto dos índices, sem ordenar nem varrer a tabela
+CREATE INDEX IF NOT EXISTS idx_orcamentos_criado ON orcamentos (criado_em DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_orcamentos_status_criado ON orcamentos (status, criado_em DESC, id DESC);
+"""
+
+_COLUNAS_LISTAGEM = "id, nome, status, criado_em, quantidade, total, incompleto, total_atual, reprecificado_em"
+
+
+@dataclass(frozen=True)
+class OrcamentoSalvo:
+    id: int
+    nome: str
+    status: str
+    criado_em: str
+    quantidade: float
+    config: dict
+    base_preco: Optional[tuple]
+    total: Optional[float]
+    incompleto: bool = False
+
+
+def _agora():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _metodo_e_custo_posto(base_preco):
+    if base_preco is None:
+        return ULTIMO, False
+    metodo, _, custo_posto = json.loads(base_preco)
+    return metodo, bool(custo_posto)
+
+
+def _json(valor):
+    def converter(v):
+        if isinstance(v, (date, datetime)):
+            return v.isoformat()
+        if hasattr(v, 'item'):  # escalares NumPy
+            return v.item()
+        raise TypeError(f"Valor não serializável: {v!r}")
+    return json.dumps(valor, ensure_ascii=False, default=converter)
+
+
+class ArmazemOrcamentos:
+    def __init__(self, caminho=CAMINHO_PADRAO):
+        self.caminho = caminho
+        # Uma conexão por armazém, compartilhada entre threads do Streamlit sob um lock
+        self._conexao = sqlite3.connect(caminho, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conexao:
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.executescript(_ESQUEMA)
+
+    def fechar(self):
+        self._conexao.close()
+
+    def salvar(self, nome, config, base_preco=None, total=None, versoes=None, incompleto=False):
+        """Grava um orçamento e retorna o id.
+
+        `incompleto` marca um total que deixou de fora componentes sem preço.
+        """
+        config = {chave: valor for chave, valor in config.items() if valor is not None}
+        with self._lock, self._conexao:
+            cursor = self._conexao.execute(
+                "INSERT INTO orcamentos (nome, criado_em, quantidade, config, base_preco, versoes, total, incompleto) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (nome, _agora(), float(config.get('quantidade', 0)), _json(config),
+                 None if base_preco is None else _json(list(base_preco)),
+                 None if versoes is None else _json(dict(versoes)),
+                 None if total is None else float(total), int(bool(incompleto))))
+            return cursor.lastrowid
+
+    def carregar(self, id_orcamento):
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT id, nome, status, criado_em, quantidade, config, base_preco, total, incompleto "
+                "FROM orcamentos WHERE id = ?", (int(id_orcamento),)).fetchone()
+        if linha is None:
+            return None
+        id_, nome, status, criado_em, quantidade, config, base_preco, total, incompleto = linha
+        return OrcamentoSalvo(id_, nome, status, criado_em, quantidade, json.loads(config),
+                              None if base_preco is None else tuple(json.loads(base_preco)), total,
+                              bool(incompleto))
+
+    def listar(self, status=None, limite=50):
+        """Orçamentos mais recentes primeiro (sem a configuração, para a listagem ficar leve)."""
+        sql = f"SELECT {_COLUNAS_LISTAGEM} FROM orcamentos"
+        parametros = []
+        if status is not None:
+            sql += " WHERE status = ?"
+            parametros.append(status)
+        sql += " ORDER BY criado_em DESC, id DESC LIMIT ?"
+        parametros.append(int(limite))
+        with self._lock:
+            cursor = self._conexao.execute(sql, parametros)
+            linhas = cursor.fetchall()
+        lista = pd.DataFrame(linhas, columns=[c.strip() for c in _COLUNAS_LISTAGEM.split(',')])
+        lista['incompleto'] = lista['incompleto'].astype(bool)
+        return lista
+
+    def alterar_status(self, id_orcamento, status):
+        with self._lock, self._conexao:
+            self._conexao.execute("UPDATE orcamentos SET status = ? WHERE id = ?", (status, int(id_orcamento)))
+
+    def excluir(self, id_orcamento):
+        with self._lock, self._conexao:
+            self._conexao.execute("DELETE FROM orcamentos WHERE id = ?", (int(id_orcamento),))
+
+    def reprecificar(self, dados, status=ABERTO, gravar=True):
+        """Recalcula os orçamentos de `status` com os preços atuais de `dados` (DadosOrcamento).
+
+        Cada orçamento mantém o método de preço e o custo posto com que foi salvo, mas
+        sem a data de referência: o preço é o mais recente. Uma chamada vetorizada de
+        `orcar` por base de preço distinta (na prática, uma a quatro para milhares de
+        orçamentos). Retorna um DataFrame (id, nome, criado_em, total, total_atual,
+        delta, delta_pct, incompleto) ordenado pelo maior delta; com `gravar`, o novo
+        total fica salvo em `total_atual`. `incompleto` vale para o orçamento salvo
+        incompleto ou que ficou sem preço agora; nesses, delta e delta_pct são NaN.
+        """
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT id, nome, criado_em, total, incompleto, base_preco, config FROM orcamentos WHERE status = ?",
+                (status,)).fetchall()
+        colunas = ['id', 'nome', 'criado_em', 'total', 'total_atual', 'delta', 'delta_pct', 'incompleto']
+        if not linhas:
+            return pd.DataFrame(columns=colunas)
+
+        ids, nomes, criados, totais, incompletos, bases, configs = zip(*linhas)
+        configs = pd.DataFrame([json.loads(c) for c in configs])
+        relatorio = pd.DataFrame({'id': ids, 'nome': nomes, 'criado_em': criados,
+                                  'total': pd.to_numeric(pd.Series(totais, dtype=object), errors='coerce'),
+                                  'total_atual': np.nan, 'incompleto': np.array(incompletos, dtype=bool)})
+        grupos = pd.Series([_metodo_e_custo_posto(base) for base in bases])
+        for (metodo, custo_posto), posicoes in grupos.groupby(grupos).indices.items():
+            precos_papel, precos_cd = funcoes_de_preco(dados.motor_papel, dados.motor_cd, metodo, None, custo_posto)
+            resultado = dados.motor_custos.orcar(configs.iloc[posicoes].reset_index(drop=True), precos_papel, precos_cd)
+            relatorio.loc[posicoes, 'total_atual'] = resultado['total'].to_numpy()
+            relatorio.loc[posicoes, 'incompleto'] |= resultado['incompleto'].to_numpy()
+        relatorio['delta'] = (relatorio['total_atual'] - relatorio['total']).mask(relatorio['incompleto'])
+        relatorio['delta_pct'] = relatorio['delta'] / relatorio['total'].where(relatorio['total'] != 0)
+
+        if gravar:
+            momento = _agora()
+            with self._lock, self._conexao:
+                self._conexao.executemany(
+                    "UPDATE orcamentos SET total_atual = ?, reprecificado_em = ? WHERE id = ?",
+                    zip(relatorio['total_atual'].astype(float).tolist(), [momento] * len(relatorio),
+                        relatorio['id'].tolist()))
+        return relatorio[colunas].sort_values('delta', ascending=False, na_position='last', ignore_index=True)
+
+
+def main(argv=None):
+    from fontes import BASE_URL
+    from modelo import carregar_modelo
+    from snapshot import Snapshot
+
+    parser = argparse.ArgumentParser(description="Orçamentos salvos e reprecificação em lote.")
+    parser.add_argument("--banco", default=CAMINHO_PADRAO, help="arquivo SQLite dos orçamentos")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+    listar = comandos.add_parser("listar", help="lista os orçamentos mais recentes")
+    listar.add_argument("--status", default=None)
+    listar.add_argument("--limite", type=int, default=50)
+    reprecificar = comandos.add_parser("reprecificar", help="recalcula os orçamentos com os preços atuais")
+    reprecificar.add_argument("--status", default=ABERTO)
+    reprecificar.add_argument("--saida", default=None, help="grava os deltas neste CSV")
+    reprecificar.add_argument("--sem-gravar", action="store_true", help="não atualiza total_atual no banco")
+    reprecificar.add_argument("--base-url", default=BASE_URL, help="origem dos CSVs de dados")
+    args = parser.parse_args(argv)
+
+    armazem = ArmazemOrcamentos(args.banco)
+    try:
+        if args.comando == "listar":
+            print(armazem.listar(args.status, args.limite).to_string(index=False))
+            return 0
+        dados = carregar_modelo(args.base_url, Snapshot())
+        relatorio = armazem.reprecificar(dados, status=args.status, gravar=not args.sem_gravar)
+    except Exception as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    finally:
+        armazem.fechar()
+
+    if args.saida:
+        relatorio.to_csv(args.saida, index=False, encoding='utf-8')
+    else:
+        print(relatorio.to_string(index=False))
+    abaixo = int((relatorio['delta'] > 0).sum())
+    incompletos = int(relatorio['incompleto'].sum())
+    print(f"✅ {len(relatorio)} orçamentos reprecificados; {abaixo} ficaram abaixo do custo atual"
+          f" ({incompletos} incompletos, sem comparação)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""Orçamento em lote: precifica um CSV de BOMs (uma configuração de produto por linha).
+
+Uso:
+    python orcar_lote.py boms.csv resultado.csv [--processos N] [--bloco 5000]
+                         [--metodo ultimo|media_ponderada] [--data AAAA-MM-DD] [--custo-posto]
+
+As colunas do CSV de entrada são as de `custos.MotorCustos.orcar` (quantidade, Miolo,
+Miolo_papel, ..., CD_<categoria>, ...). O arquivo é lido em blocos, cada bloco é
+precificado num processo do pool e o resultado é gravado na ordem de entrada assim
+que fica pronto, com as colunas de entrada seguidas do detalhamento por componente.
+No máximo 2 blocos por processo ficam em memória ao mesmo tempo.
+"""
+import argparse
+import itertools
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+from fontes import BASE_URL
+from modelo import carregar_modelo
+from precos import MEDIA_PONDERADA, ULTIMO, funcoes_de_preco
+from snapshot import Snapshot
+
+BLOCO_PADRAO = 5000
+
+_motor = None
+_precos_papel = None
+_precos_cd = None
+_erro = None
+
+
+def _preparar(dados, metodo, data, custo_posto):
+    global _motor, _precos_papel, _precos_cd
+    _motor = dados.motor_custos
+    _precos_papel, _precos_cd = funcoes_de_preco(dados.motor_papel, dados.motor_cd, metodo, data, custo_posto)
+
+
+def _inicializar(dados, metodo, data, custo_posto):
+    # Roda uma vez por processo do pool, com o modelo que o processo principal
+    # carregou: todos os blocos do lote são precificados sobre os mesmos dados, mesmo
+    # que o app ou o snapshot.py re-ingiram uma fonte durante o lote
+    global _erro
+    try:
+        _preparar(dados, metodo, data, custo_posto)
+    except Exception as e:
+        _erro = e  # levantado no primeiro bloco, com a mensagem original
+
+
+def _orcar_bloco(bloco, cabecalho):
+    # Formatar o CSV é a parte mais cara, então também fica no processo do pool
+    if _erro is not None:
+        raise _erro
+    resultado = _motor.orcar(bloco, _precos_papel, _precos_cd)
+    texto = pd.concat([bloco.reset_index(drop=True), resultado], axis=1).to_csv(header=cabecalho, index=False)
+    return texto, len(bloco)
+
+
+def _blocos(entrada, bloco):
+    # Como texto: o pandas infere os tipos bloco a bloco, e as colunas de entrada
+    # ecoadas na saída mudariam com o tamanho do bloco ("4" num bloco, "4.0" noutro).
+    # Sempre sai pelo menos um bloco, mesmo vazio, para o cabeçalho ser gravado
+    try:
+        leitor = pd.read_csv(entrada, chunksize=bloco, encoding='utf-8', dtype=str)
+    except pd.errors.EmptyDataError:  # arquivo vazio, nem cabeçalho
+        yield pd.DataFrame()
+        return
+    vazio = True
+    with leitor:
+        for df in leitor:
+            vazio = False
+            yield df
+    if vazio:
+        yield pd.read_csv(entrada, nrows=0, encoding='utf-8', dtype=str)
+
+
+def orcar_arquivo(entrada, saida, processos=None, bloco=BLOCO_PADRAO, base_url=BASE_URL,
+                  metodo=ULTIMO, data=None, custo_posto=False):
+    """Precifica `entrada` e grava em `saida`; retorna o número de linhas processadas."""
+    processos = processos or os.cpu_count() or 1
+    # Carregado uma vez aqui (revalida as fontes e atualiza o snapshot); os processos
+    # do pool recebem o modelo pronto
+    dados = carregar_modelo(base_url, Snapshot())
+    blocos = _blocos(entrada, bloco)
+    # O primeiro bloco é lido antes de criar `saida`: um erro de leitura não deixa arquivo vazio
+    leitor = itertools.chain([next(blocos)], blocos)
+    linhas = 0
+
+    with open(saida, 'w', encoding='utf-8', newline='') as arquivo:
+        def gravar(resultado):
+            nonlocal linhas
+            texto, n = resultado
+            arquivo.write(texto)
+            linhas += n
+
+        if processos == 1:
+            _preparar(dados, metodo, data, custo_posto)
+            for numero, df in enumerate(leitor):
+                gravar(_orcar_bloco(df, numero == 0))
+            return linhas
+
+        with ProcessPoolExecutor(max_workers=processos, initializer=_inicializar,
+                                 initargs=(dados, metodo, data, custo_posto)) as executor:
+            pendentes = {}  # futuro -> número do bloco
+            prontos = {}    # número do bloco -> resultado aguardando a vez de ser gravado
+            proximo = 0
+            for numero, df in enumerate(leitor):
+                pendentes[executor.submit(_orcar_bloco, df, numero == 0)] = numero
+                while len(pendentes) + len(prontos) >= 2 * processos:
+                    proximo = _coletar(pendentes, prontos, proximo, gravar)
+            while pendentes:
+                proximo = _coletar(pendentes, prontos, proximo, gravar)
+    return linhas
+
+
+def _coletar(pendentes, prontos, proximo, gravar):
+    if pendentes:
+        concluidos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+        for futuro in concluidos:
+            prontos[pendentes.pop(futuro)] = futuro.result()
+    while proximo in prontos:
+        gravar(prontos.pop(proximo))
+        proximo += 1
+    return proximo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Orçamento em lote a partir de um CSV de BOMs.")
+    parser.add_argument("entrada", help="CSV com uma configuração de produto por linha")
+    parser.add_argument("saida", help="CSV de saída com o detalhamento de custos")
+    parser.add_argument("--processos", type=int, default=None, help="processos do pool (padrão: núcleos)")
+    parser.add_argument("--bloco", type=int, default=BLOCO_PADRAO, help="linhas por bloco")
+    parser.add_argument("--base-url", default=BASE_URL, help="origem dos CSVs de dados")
+    parser.add_argument("--metodo", choices=[ULTIMO, MEDIA_PONDERADA], default=ULTIMO)
+    parser.add_argument("--data", default=None, help="data de referência dos preços (AAAA-MM-DD)")
+    parser.add_argument("--custo-posto", action="store_true", help="soma frete e abate crédito de ICMS")
+    args = parser.parse_args(argv)
+
+    try:
+        linhas = orcar_arquivo(args.entrada, args.saida, args.processos, args.bloco, args.base_url,
+                               args.metodo, args.data, args.custo_posto)
+    except Exception as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    print(f"✅ {linhas} linhas orçadas em {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,307 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# ================== ÍNDICE DE PREÇOS DE PAPEL ==================
+# Construído uma vez, no carregamento, a partir de `df_compras` já ordenado da compra
+# mais recente para a mais antiga (`dados.ler_compras`: DataEfetiva e, no mesmo dia,
+# a linha mais abaixo no arquivo — a mesma regra do MotorPrecos). Troca o filtro
+# `df_compras[df_compras['PapelLimpo'] == papel].iloc[0]` — uma varredura do
+# histórico inteiro a cada componente e a cada rerun — por um lookup O(1).
+
+ULTIMOS_N = 5
+
+
+def _somente_leitura(array):
+    # Os índices são compartilhados entre sessões (st.cache_resource): nada pode alterá-los
+    array = np.asarray(array)
+    array.flags.writeable = False
+    return array
+
+
+@dataclass(frozen=True)
+class PrecoPapel:
+    papel: str
+    preco: float               # preço da compra mais recente
+    fornecedor: Optional[str]  # fornecedor da compra mais recente
+    data: Optional[pd.Timestamp]
+    ultimos: tuple             # últimos ULTIMOS_N preços, do mais recente ao mais antigo
+    minimo: float
+    maximo: float
+    compras: int
+
+
+def _recencia(data):
+    # Chave de ordenação da mais recente para a mais antiga, compras sem data por último
+    return (True, 0) if pd.isna(data) else (False, -data.value)
+
+
+class IndicePrecos:
+    def __init__(self, df_compras, ultimos_n=ULTIMOS_N):
+        self.ultimos_n = ultimos_n
+        self._por_papel, self._datas_ultimos = self._resumir(df_compras, ultimos_n)
+        self._indexar()
+
+    @staticmethod
+    def _resumir(df_compras, ultimos_n):
+        grupos = df_compras.groupby('PapelLimpo', sort=False, observed=True)
+        # Mesma ordem de df_compras: a primeira linha de cada grupo é a compra mais recente
+        recentes = grupos.nth(0).set_index('PapelLimpo')
+        estatisticas = grupos['ValorUnitario'].agg(['min', 'max', 'size'])
+        ultimos = grupos.head(ultimos_n).groupby('PapelLimpo', sort=False, observed=True)
+        precos_ultimos = ultimos['ValorUnitario'].agg(tuple)
+        datas_ultimos = ultimos['DataEfetiva'].agg(tuple)
+
+        por_papel = {
+            papel: PrecoPapel(
+                papel=papel,
+                preco=float(preco),
+                fornecedor=None if pd.isna(fornecedor) else fornecedor,
+                data=None if pd.isna(data) else data,
+                ultimos=tuple(float(p) for p in precos_ultimos[papel]),
+                minimo=float(estatisticas.at[papel, 'min']),
+                maximo=float(estatisticas.at[papel, 'max']),
+                compras=int(estatisticas.at[papel, 'size']),
+            )
+            for papel, preco, fornecedor, data in zip(
+                recentes.index.astype(object), recentes['ValorUnitario'], recentes['Fornecedor'],
+                recentes['DataEfetiva'])
+        }
+        # Datas dos `ultimos`, para juntar compras novas sem voltar ao histórico
+        return por_papel, {papel: tuple(datas_ultimos[papel]) for papel in por_papel}
+
+    def _indexar(self):
+        self.papeis = pd.Index(list(self._por_papel), dtype=object)
+        self.precos = _somente_leitura(np.array([info.preco for info in self._por_papel.values()], dtype=float))
+
+    def juntar(self, df_novas):
+        """Novo índice com as compras de `df_novas` (linhas anexadas ao CSV, já limpas).
+
+        Só os papéis de `df_novas` são recalculados, a partir do resumo guardado de cada
+        um (últimas compras com as datas, mínimo, máximo, contagem), sem passar pelo
+        histórico. Dá o mesmo resultado que um índice montado sobre `dados.juntar_compras`.
+        """
+        novas, datas_novas = self._resumir(df_novas, self.ultimos_n)
+        por_papel, datas_ultimos = dict(self._por_papel), dict(self._datas_ultimos)
+        for papel, nova in novas.items():
+            antiga = por_papel.get(papel)
+            if antiga is None:
+                por_papel[papel], datas_ultimos[papel] = nova, datas_novas[papel]
+                continue
+            # As novas primeiro: no empate de data, a linha anexada é a mais recente
+            precos = nova.ultimos + antiga.ultimos
+            datas = datas_novas[papel] + datas_ultimos[papel]
+            ordem = sorted(range(len(precos)), key=lambda i: _recencia(datas[i]))[:self.ultimos_n]
+            recente = nova if ordem[0] < len(nova.ultimos) else antiga
+            por_papel[papel] = PrecoPapel(
+                papel=papel,
+                preco=precos[ordem[0]],
+                fornecedor=recente.fornecedor,
+                data=recente.data,
+                ultimos=tuple(precos[i] for i in ordem),
+                minimo=min(nova.minimo, antiga.minimo),
+                maximo=max(nova.maximo, antiga.maximo),
+                compras=nova.compras + antiga.compras,
+            )
+            datas_ultimos[papel] = tuple(datas[i] for i in ordem)
+
+        juntado = object.__new__(IndicePrecos)
+        juntado.ultimos_n = self.ultimos_n
+        juntado._por_papel, juntado._datas_ultimos = por_papel, datas_ultimos
+        juntado._indexar()
+        return juntado
+
+    def __contains__(self, papel):
+        return papel in self._por_papel
+
+    def __len__(self):
+        return len(self._por_papel)
+
+    def get(self, papel):
+        return self._por_papel.get(papel)
+
+    def preco(self, papel):
+        """Preço mais recente do papel, ou None se ele nunca foi comprado."""
+        info = self._por_papel.get(papel)
+        return None if info is None else info.preco
+
+    def precos_de(self, papeis):
+        """Preços mais recentes para uma sequência de papéis (NaN onde não há compra)."""
+        posicoes = self.papeis.get_indexer(papeis)
+        if not len(self.precos):
+            return np.full(len(posicoes), np.nan)
+        return np.where(posicoes >= 0, self.precos[posicoes], np.nan)
+
+
+# ================== MOTOR DE PREÇOS NO TEMPO ==================
+# Responde, de forma vetorizada, "quanto custava cada item na data X": último preço,
+# média ponderada pelo volume comprado e custo posto (frete somado, crédito de ICMS
+# abatido, rateados pela quantidade da compra). As compras ficam ordenadas por
+# (item, data) em arrays NumPy; cada consulta é um `searchsorted` sobre uma chave
+# combinada item/dia e as médias saem de somas acumuladas, sem refiltrar DataFrames.
+
+ULTIMO = 'ultimo'
+MEDIA_PONDERADA = 'media_ponderada'
+
+_DESLOCAMENTO_DIA = 2 ** 31
+
+
+def _dias(datas):
+    return pd.DatetimeIndex(datas).to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+def _compras(itens, datas, precos, quantidades, frete, icms):
+    # Compras válidas na ordem recebida: (itens, dias, preço unitário, preço posto, peso)
+    itens = pd.Series(itens).astype(object).reset_index(drop=True)
+    datas = pd.Series(pd.to_datetime(datas)).reset_index(drop=True)
+    precos = pd.to_numeric(pd.Series(precos), errors='coerce').to_numpy(dtype=float)
+    quantidades = pd.to_numeric(pd.Series(quantidades), errors='coerce').fillna(0).to_numpy(dtype=float)
+    frete = np.zeros(len(precos)) if frete is None else pd.to_numeric(pd.Series(frete), errors='coerce').fillna(0).to_numpy(dtype=float)
+    icms = np.zeros(len(precos)) if icms is None else pd.to_numeric(pd.Series(icms), errors='coerce').fillna(0).to_numpy(dtype=float)
+
+    validos = (itens.notna() & datas.notna()).to_numpy() & ~np.isnan(precos)
+    quantidades = quantidades[validos]
+    unitario = precos[validos]
+    com_qtd = quantidades > 0
+    rateio = np.divide(frete[validos] - icms[validos], quantidades, out=np.zeros(len(quantidades)), where=com_qtd)
+    peso = np.where(com_qtd, quantidades, 0.0)
+    return itens[validos], _dias(datas[validos]), unitario, unitario + rateio, peso
+
+
+class MotorPrecos:
+    def __init__(self, itens, datas, precos, quantidades, frete=None, icms=None):
+        itens, dias, unitario, posto, peso = _compras(itens, datas, precos, quantidades, frete, icms)
+        codigos, unicos = pd.factorize(itens)
+        # Empates no mesmo dia: a linha mais abaixo no arquivo conta como a mais recente
+        ordem = np.lexsort((np.arange(len(codigos)), dias, codigos))
+        self._montar(pd.Index(unicos), codigos[ordem], self._combinar(codigos[ordem], dias[ordem]),
+                     unitario[ordem], posto[ordem], peso[ordem])
+
+    def _montar(self, itens, codigos, chave, unitario, posto, peso):
+        # Arrays já ordenados por (item, dia, ordem no arquivo)
+        self.itens = itens
+        self._codigos = _somente_leitura(codigos)
+        self._chave = _somente_leitura(chave)
+        self._inicio = _somente_leitura(np.searchsorted(self._codigos, np.arange(len(self.itens)), side='left'))
+        self._peso = _somente_leitura(peso)
+        self._preco = {False: _somente_leitura(unitario), True: _somente_leitura(posto)}
+        self._acum_peso = _somente_leitura(np.concatenate(([0.0], np.cumsum(peso))))
+        self._acum_valor = {
+            False: _somente_leitura(np.concatenate(([0.0], np.cumsum(unitario * peso)))),
+            True: _somente_leitura(np.concatenate(([0.0], np.cumsum(posto * peso)))),
+        }
+
+    def juntar(self, itens, datas, precos, quantidades, frete=None, icms=None):
+        """Novo motor com compras anexadas ao arquivo (na ordem do arquivo) somadas às deste.
+
+        Só as compras novas são ordenadas; entram por `searchsorted` nos arrays já
+        ordenados, sem refatorar nem reordenar o histórico. Mesmos preços que um motor
+        montado sobre o arquivo inteiro.
+        """
+        itens, dias, unitario, posto, peso = _compras(itens, datas, precos, quantidades, frete, icms)
+        todos = self.itens.append(pd.Index(pd.unique(itens), dtype=object).difference(self.itens, sort=False))
+        codigos = todos.get_indexer(itens)
+        ordem = np.lexsort((np.arange(len(codigos)), dias, codigos))
+        chave = self._combinar(codigos[ordem], dias[ordem])
+        # Vêm depois no arquivo: no empate de item e dia, depois das compras antigas
+        posicoes = np.searchsorted(self._chave, chave, side='right')
+
+        juntado = object.__new__(MotorPrecos)
+        juntado._montar(todos, np.insert(self._codigos, posicoes, codigos[ordem]),
+                        np.insert(self._chave, posicoes, chave),
+                        np.insert(self._preco[False], posicoes, unitario[ordem]),
+                        np.insert(self._preco[True], posicoes, posto[ordem]),
+                        np.insert(self._peso, posicoes, peso[ordem]))
+        return juntado
+
+    @staticmethod
+    def _combinar(codigos, dias):
+        return codigos.astype(np.int64) * (2 ** 32) + (dias + _DESLOCAMENTO_DIA)
+
+    @classmethod
+    def de_compras(cls, df_compras):
+        # DataEfetiva (emissão → aprovação → solicitação) vem pronta de `dados.ler_compras`,
+        # que ordena da mais recente para a mais antiga: invertido, a linha mais abaixo é
+        # a mais recente também nos empates, como o IndicePrecos
+        df_compras = df_compras.iloc[::-1]
+        return cls(df_compras['PapelLimpo'], df_compras['DataEfetiva'], df_compras['ValorUnitario'],
+                   df_compras['Quantidade'], df_compras['ValorFrete'], df_compras['CreditoICMS'])
+
+    @classmethod
+    def de_compras_diretas(cls, df_cd):
+        return cls(df_cd['NomeLimpo'], df_cd['DataEfetiva'], df_cd['VALOR_UNITARIO'],
+                   df_cd['QUANTIDADE'], df_cd.get('VALOR_FRETE'), df_cd.get('CREDITO_ICMS'))
+
+    def juntar_compras(self, df_novas):
+        """`juntar` com as linhas anexadas de `dados.ler_compras` (ver `de_compras`)."""
+        df_novas = df_novas.iloc[::-1]
+        return self.juntar(df_novas['PapelLimpo'], df_novas['DataEfetiva'], df_novas['ValorUnitario'],
+                           df_novas['Quantidade'], df_novas['ValorFrete'], df_novas['CreditoICMS'])
+
+    def juntar_compras_diretas(self, df_novas):
+        return self.juntar(df_novas['NomeLimpo'], df_novas['DataEfetiva'], df_novas['VALOR_UNITARIO'],
+                           df_novas['QUANTIDADE'], df_novas.get('VALOR_FRETE'), df_novas.get('CREDITO_ICMS'))
+
+    def precos(self, itens, data=None, metodo=ULTIMO, custo_posto=False, janela_dias=None):
+        """Preço de cada item na data de referência (NaN se não houver compra até lá).
+
+        `data` pode ser um escalar ou uma sequência alinhada com `itens`; None usa
+        todo o histórico. Com MEDIA_PONDERADA, `janela_dias` limita a média às
+        compras dos últimos N dias até a data (sem data, até a última compra do item).
+        """
+        codigos = self.itens.get_indexer(list(itens))
+        n = len(codigos)
+        if data is None:
+            dias = np.full(n, _DESLOCAMENTO_DIA - 1, dtype=np.int64)
+        elif np.ndim(data) == 0:
+            dias = np.full(n, _dias([pd.Timestamp(data)])[0], dtype=np.int64)
+        else:
+            dias = _dias(pd.to_datetime(list(data)))
+
+        resultado = np.full(n, np.nan)
+        if not len(self._chave):
+            return resultado
+        conhecidos = codigos >= 0
+        fim = np.searchsorted(self._chave, self._combinar(codigos, dias), side='right')
+        ultima = np.clip(fim - 1, 0, None)
+        encontrados = conhecidos & (fim > 0) & (self._codigos[ultima] == codigos)
+
+        precos = self._preco[bool(custo_posto)]
+        resultado[encontrados] = precos[ultima[encontrados]]
+        if metodo == ULTIMO:
+            return resultado
+        if metodo != MEDIA_PONDERADA:
+            raise ValueError(f"Método de preço desconhecido: {metodo}")
+
+        inicio = self._inicio[np.where(conhecidos, codigos, 0)]
+        if janela_dias is not None:
+            if data is None:
+                # Sem data, a janela termina na última compra de cada item
+                dias = self._chave[ultima] - self._combinar(codigos, 0)
+            limite = self._combinar(codigos, dias - int(janela_dias))
+            inicio = np.maximum(inicio, np.searchsorted(self._chave, limite, side='right'))
+        peso = self._acum_peso[fim] - self._acum_peso[inicio]
+        valor = self._acum_valor[bool(custo_posto)][fim] - self._acum_valor[bool(custo_posto)][inicio]
+        # Sem quantidade informada no período, fica o último preço
+        media = np.divide(valor, peso, out=resultado.copy(), where=encontrados & (peso > 0))
+        return np.where(encontrados, media, np.nan)
+
+
+def funcoes_de_preco(motor_papel, motor_cd, metodo=ULTIMO, data=None, custo_posto=False):
+    """(precos_papel, precos_cd) no formato de `MotorCustos.orcar` para uma base de preço.
+
+    Na base padrão (última compra, sem data, sem custo posto) devolve (None, None) e o
+    motor de custos usa o índice de preços e o catálogo diretamente.
+    """
+    if metodo == ULTIMO and data is None and not custo_posto:
+        return None, None
+
+    def precos_papel(papeis):
+        return motor_papel.precos(papeis, data, metodo, custo_posto)
+
+    def precos_cd(categoria, nomes):
+        return motor_cd.precos(nomes, data, metodo, custo_posto)
+
+    return precos_papel, precos_cd
@@ -0,0 +1,153 @@
+import glob
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: só o lock entre threads
+    fcntl = None
+
+import pyarrow as pa
+
+# ================== SNAPSHOT COLUNAR (ARROW IPC) ==================
+# Guarda os DataFrames já limpos de cada fonte em arquivos Arrow IPC sem compressão,
+# lidos via memory-map: um cold start não re-parseia nem re-limpa os CSVs, e vários
+# workers no mesmo host compartilham as mesmas páginas do page cache.
+#
+# Layout: <diretório>/v<VERSAO>/manifesto.json + <fonte>-<hash>.arrow
+# Ao gravar, os subdiretórios v<N> de outras versões são apagados.
+# O manifesto guarda, por fonte, o hash do CSV de origem e os validadores HTTP
+# (ETag/Last-Modified), então a fonte só é re-ingerida quando o arquivo muda, e o
+# tamanho em bytes do CSV processado, usado na ingestão incremental (fontes.py).
+
+VERSAO = 4  # incrementar quando mudar a limpeza ou o esquema dos DataFrames
+DIRETORIO_PADRAO = os.environ.get(
+    "ORCAMENTO_SNAPSHOT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".snapshot")
+)
+MANIFESTO = "manifesto.json"
+TRAVA = "manifesto.lock"
+_DIRETORIO_VERSAO = re.compile(r"v\d+")  # subdiretórios de versão: v1, v2, ...
+
+# O carregador salva as fontes em paralelo (threads) e os workers do orcar_lote
+# podem apontar para o mesmo diretório (processos): a leitura-alteração-gravação do
+# manifesto fica sob um lock do processo e um flock no arquivo de trava.
+_TRAVA_PROCESSO = threading.Lock()
+
+
+class Snapshot:
+    def __init__(self, diretorio=DIRETORIO_PADRAO):
+        self.raiz = diretorio
+        self.diretorio = os.path.join(diretorio, f"v{VERSAO}")
+        self._caminho_manifesto = os.path.join(self.diretorio, MANIFESTO)
+        self._versoes_antigas_apagadas = False
+
+    def _ler_manifesto(self):
+        try:
+            with open(self._caminho_manifesto, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @contextmanager
+    def _travado(self):
+        with _TRAVA_PROCESSO, open(os.path.join(self.diretorio, TRAVA), "a") as trava:
+            if fcntl is not None:
+                fcntl.flock(trava, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(trava, fcntl.LOCK_UN)
+
+    def _gravar_atomico(self, caminho, escrever):
+        fd, temporario = tempfile.mkstemp(dir=self.diretorio, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                escrever(f)
+            os.replace(temporario, caminho)
+        except BaseException:
+            os.unlink(temporario)
+            raise
+
+    def carregar(self, nome):
+        """Retorna (DataFrame, metadados) da fonte, ou None se não houver snapshot."""
+        meta = self._ler_manifesto().get(nome)
+        if meta is None:
+            return None
+        caminho = os.path.join(self.diretorio, meta["arquivo"])
+        try:
+            with pa.memory_map(caminho, "r") as origem:
+                tabela = pa.ipc.open_file(origem).read_all()
+        except (OSError, pa.ArrowInvalid):
+            return None
+        # split_blocks evita consolidar colunas numéricas, permitindo zero-copy do mmap
+        return tabela.to_pandas(split_blocks=True), meta
+
+    def _apagar_versoes_antigas(self):
+        # Snapshots de outra VERSAO nunca mais são lidos; quem ainda tem um arquivo
+        # deles mapeado continua lendo normalmente depois do unlink
+        for nome in os.listdir(self.raiz):
+            caminho = os.path.join(self.raiz, nome)
+            if _DIRETORIO_VERSAO.fullmatch(nome) and caminho != self.diretorio and os.path.isdir(caminho):
+                shutil.rmtree(caminho, ignore_errors=True)
+        self._versoes_antigas_apagadas = True
+
+    def salvar(self, nome, df, digest, etag=None, last_modified=None, tamanho=None):
+        os.makedirs(self.diretorio, exist_ok=True)
+        if not self._versoes_antigas_apagadas:
+            self._apagar_versoes_antigas()
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        arquivo = f"{nome}-{digest[:16]}.arrow"
+
+        def escrever(f):
+            with pa.ipc.new_file(f, tabela.schema) as escritor:
+                escritor.write_table(tabela)
+
+        with self._travado():
+            self._gravar_atomico(os.path.join(self.diretorio, arquivo), escrever)
+            manifesto = self._ler_manifesto()
+            manifesto[nome] = {
+                "arquivo": arquivo,
+                "hash": digest,
+                "etag": etag,
+                "last_modified": last_modified,
+                "tamanho": tamanho,
+                "ingerido_em": time.time(),
+            }
+            self._gravar_atomico(
+                self._caminho_manifesto,
+                lambda f: f.write(json.dumps(manifesto, indent=2, ensure_ascii=False).encode("utf-8")),
+            )
+            # Sob a trava, nenhum outro arquivo desta fonte está (ou vai ficar) no manifesto.
+            # Leitores com um arquivo antigo mapeado continuam válidos após o unlink.
+            for antigo in glob.glob(os.path.join(glob.escape(self.diretorio), f"{glob.escape(nome)}-*.arrow")):
+                if os.path.basename(antigo) != arquivo:
+                    try:
+                        os.unlink(antigo)
+                    except OSError:
+                        pass
+
+
+def ingerir(diretorio=DIRETORIO_PADRAO, forcar=False):
+    """Baixa as fontes e atualiza o snapshot; só re-ingere as que mudaram."""
+    from fontes import CarregadorFontes
+
+    carregador = CarregadorFontes(snapshot=Snapshot(diretorio))
+    _, erros, _ = carregador.carregar(forcar=forcar)
+    return carregador.estatisticas, erros
+
+
+if __name__ == "__main__":
+    import sys
+
+    estatisticas, erros = ingerir(forcar="--forcar" in sys.argv)
+    print(json.dumps(estatisticas))
+    for nome, e in erros.items():
+        print(f"❌ {nome}: {e}", file=sys.stderr)
+    sys.exit(1 if erros else 0)
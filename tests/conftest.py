@@ -0,0 +1,17 @@
+import os
+import pathlib
+import sys
+
+import pytest
+
+# Os módulos do app ficam na raiz do repositório (não é um pacote instalado)
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+
+@pytest.fixture(scope='session')
+def modelo_repositorio():
+    """DadosOrcamento dos CSVs do repositório, lidos por file:// (sem rede nem snapshot)."""
+    from modelo import carregar_modelo
+    return carregar_modelo(pathlib.Path(RAIZ).as_uri())
@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import dados
+from catalogo import COLUNA_CATEGORIA, CatalogoCompraDireta, mapear_wireo
+from conftest import RAIZ
+from custos import WIREO
+from limpeza import limpar_nomes_cd
+
+
+def _ler(arquivo, ler):
+    with open(os.path.join(RAIZ, arquivo), 'rb') as f:
+        return ler(f.read())
+
+
+def _catalogo():
+    df_cd = _ler('compradiretav2.csv', dados.ler_compras_diretas)
+    wireo = _ler('tabelawireo.csv', dados.ler_wireo)
+    return df_cd, wireo, CatalogoCompraDireta(df_cd, mapear_wireo(wireo))
+
+
+def test_um_item_por_nome_com_o_preco_mais_recente():
+    df_cd, _, catalogo = _catalogo()
+    grupos = df_cd.reset_index(drop=True).groupby([COLUNA_CATEGORIA, 'NomeLimpo'], observed=True)
+    assert len(catalogo) == grupos.ngroups
+    for (categoria, nome), compras in grupos:
+        # Maior data; no empate, a linha mais abaixo no arquivo
+        recente = compras[compras['DataEfetiva'] == compras['DataEfetiva'].max()].iloc[-1]
+        item = catalogo.item(categoria, nome)
+        assert item.preco == recente['VALOR_UNITARIO']
+        assert item.data == recente['DataEfetiva']
+    assert catalogo.categorias() == sorted(df_cd[COLUNA_CATEGORIA].unique())
+    for categoria in catalogo.categorias():
+        nomes = catalogo.itens(categoria)
+        assert list(nomes) == sorted(set(nomes))
+        np.testing.assert_array_equal(catalogo.precos_de(categoria, list(nomes)),
+                                      [catalogo.item(categoria, nome).preco for nome in nomes])
+
+
+def test_empate_e_compras_sem_data():
+    df_cd = pd.DataFrame({
+        COLUNA_CATEGORIA: ['FITA'] * 4,
+        'NomeLimpo': ['CETIM', 'CETIM', 'CETIM', 'GORGURAO'],
+        'VALOR_UNITARIO': [1.0, 2.0, 3.0, 4.0],
+        'DataEfetiva': pd.to_datetime(['2024-01-10', '2024-01-10', None, None]),
+    })
+    catalogo = CatalogoCompraDireta(df_cd)
+    assert catalogo.item('FITA', 'CETIM').preco == 2.0  # a data vence a compra sem data
+    assert catalogo.item('FITA', 'GORGURAO').preco == 4.0
+    assert np.isnan(catalogo.precos_de('FITA', ['INEXISTENTE'])).all()
+
+
+def test_todo_wireo_encontra_os_aneis_por_caixa():
+    _, wireo, catalogo = _catalogo()
+    nomes = catalogo.itens(WIREO)
+    assert nomes
+    por_caixa = catalogo.quantidades_por_caixa(WIREO, list(nomes))
+    assert not np.isnan(por_caixa).any(), [n for n, q in zip(nomes, por_caixa) if np.isnan(q)]
+    # A mesma quantidade da linha da tabela de WIRE-O de mesmo nome canônico
+    tabela = dict(zip(limpar_nomes_cd(wireo['WIREO']), wireo['QUANTIDADE_POR_CAIXA']))
+    assert por_caixa.tolist() == [float(tabela[nome]) for nome in nomes]
+    assert all(catalogo.item(WIREO, nome).quantidade_por_caixa == tabela[nome] for nome in nomes)
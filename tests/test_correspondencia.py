@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+from correspondencia import ChavePapel, IndicePapeis, extrair_chave, sugerir_para_tabelas
+
+
+@pytest.mark.parametrize('nome, chave', [
+    # Grafias da gramatura
+    ('Offset 75G', ChavePapel('offset', 75, None)),
+    ('Offset 75g/m2', ChavePapel('offset', 75, None)),
+    ('OFFSET 75 GRS/M2', ChavePapel('offset', 75, None)),
+    # Formato: menor lado primeiro; a partir de 200 os lados estão em mm
+    ('Offset 75G/M2 96X66', ChavePapel('offset', 75, '66x96')),
+    ('OFFSET 75G 660 X 960', ChavePapel('offset', 75, '66x96')),
+    ('Papel 120g 200 X 300', ChavePapel('papel', 120, '20x30')),
+    ('Papel 120g 199 X 300', ChavePapel('papel', 120, '199x300')),
+    ('Polen 80G/M2 66,5X96', ChavePapel('polen', 80, '66.5x96')),
+    # Formato ISO e contagem de folhas fora do tipo
+    ('Offset 90g A4 500 Fls', ChavePapel('offset', 90, 'A4')),
+    ('Brilho 210G/M2 66 X 96 - 150 Folhas', ChavePapel('brilho', 210, '66x96')),
+    # Acentos e caixa
+    ('Couché Brilho 90G 66X96', ChavePapel('couche brilho', 90, '66x96')),
+    ('75g', ChavePapel('', 75, None)),
+])
+def test_extrair_chave(nome, chave):
+    assert extrair_chave(nome) == chave
+
+
+PAPEIS = ['Offset 75G/M2 66X96', 'Offset 90G/M2 66X96', 'Offset 75G/M2 76X112',
+          'Polen Natural 80G/M2 66X96', 'Couche Brilho 90G 66X96']
+
+
+def test_buscar_ordena_por_tipo_gramatura_e_formato():
+    indice = IndicePapeis(PAPEIS)
+    resultado = indice.buscar('OFFSET 75g 660 X 960')
+    assert [c.papel for c in resultado] == ['Offset 75G/M2 66X96', 'Offset 90G/M2 66X96', 'Offset 75G/M2 76X112']
+    assert resultado[0].pontuacao == 1.0
+    assert resultado[0].pontuacao > resultado[1].pontuacao > resultado[2].pontuacao
+    assert len(indice.buscar('Offset', limite=1)) == 1
+    assert [c.papel for c in indice.buscar('Polen 80g 66x96')][0] == 'Polen Natural 80G/M2 66X96'
+
+
+def test_buscar_sem_tipo_ou_sem_candidatos():
+    indice = IndicePapeis(PAPEIS)
+    # Só gramatura: o tipo vazio não compartilha trigramas com nenhum papel
+    assert indice.buscar('75g') == ()
+    assert indice.buscar('') == ()
+    assert indice.buscar('xyz') == ()
+    assert IndicePapeis([]).buscar('Offset 75G') == ()
+
+
+def test_sugerir_para_tabelas():
+    indice = IndicePapeis(PAPEIS)
+    tabelas = {'Miolo': pd.DataFrame({'Papel': ['Offset 75G 660X960', None, '']}),
+               'Bolsa': pd.DataFrame({'Papel': ['Offset 75G 660X960', 'Polen 80g']})}
+    sugestoes = sugerir_para_tabelas(indice, tabelas, limite=2)
+    assert list(sugestoes) == ['Offset 75G 660X960', 'Polen 80g']
+    assert sugestoes['Offset 75G 660X960'] == indice.buscar('Offset 75G 660X960', 2)
+    assert sugestoes['Polen 80g'][0].papel == 'Polen Natural 80G/M2 66X96'
@@ -0,0 +1,190 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dados
+from catalogo import CatalogoCompraDireta, mapear_wireo
+from conftest import RAIZ
+from custos import PERSONALIZADO, PREFIXO_CD, QUANTIDADE_POR_CAIXA_PADRAO, WIREO, MotorCustos
+
+# ================== REFERÊNCIA: CONTAS ORIGINAIS DO APP ==================
+# Cópias de `calcular_custo`, `calcular_personalizado` e do custo das compras diretas
+# como eram calculados no app, item a item, antes do motor vetorizado. O preço do papel
+# sai do filtro original em `df_compras` (primeira linha = compra mais recente).
+
+
+def _ler(arquivo, ler):
+    with open(os.path.join(RAIZ, arquivo), 'rb') as f:
+        return ler(f.read())
+
+
+@pytest.fixture(scope='module')
+def df_compras():
+    return _ler('compradepapel.csv', dados.ler_compras)
+
+
+TABELAS = {
+    'Miolo': ('usodepapelmiolos.csv', dados.COLUNAS_MIOLO),
+    'Bolsa': ('usodepapelbolsa.csv', dados.COLUNAS_BOLSA),
+    'Divisoria': ('usodepapeldivisoria.csv', dados.COLUNAS_DIVISORIA),
+    'Adesivo': ('usodepapeladesivo.csv', dados.COLUNAS_ADESIVO),
+}
+
+
+def _tabela(tipo):
+    arquivo, colunas = TABELAS[tipo]
+    return _ler(arquivo, dados.ler_componente(colunas))
+
+
+def calcular_custo_original(nome_item, df_item, tipo, df_compras, quantidade_orcamento):
+    linha = df_item[df_item[tipo] == nome_item].iloc[0]
+    papel_necessario = linha['Papel']
+    qtd_papel_total = linha['QuantidadePapel']
+    qtd_aprovada = linha['QuantidadeAprovada']
+    valor_impressao = linha['ValorImpressao']
+
+    if qtd_aprovada <= 0:
+        qtd_aprovada = 1
+
+    folhas_por_unidade = qtd_papel_total / qtd_aprovada
+    df_papel = df_compras[df_compras['PapelLimpo'] == papel_necessario]
+    if df_papel.empty:
+        return None
+
+    preco_unitario_papel = df_papel.iloc[0]['ValorUnitario']
+    custo_papel_por_unidade = preco_unitario_papel * folhas_por_unidade
+    custo_servico_por_unidade = valor_impressao / quantidade_orcamento
+    return custo_papel_por_unidade + custo_servico_por_unidade
+
+
+def calcular_personalizado_original(papel_selecionado, aproveitamento, valor_servico, quantidade_orcamento,
+                                    df_compras):
+    if aproveitamento <= 0:
+        aproveitamento = 1
+
+    df_papel = df_compras[df_compras['PapelLimpo'] == papel_selecionado]
+    if df_papel.empty:
+        return None
+
+    preco_unitario_papel = df_papel.iloc[0]['ValorUnitario']
+    custo_papel_por_unidade = preco_unitario_papel / aproveitamento
+    custo_servico_por_unidade = valor_servico / quantidade_orcamento
+    return custo_papel_por_unidade + custo_servico_por_unidade
+
+
+def custo_cd_original(categoria, selecionado, preco_unitario, mapeamento_wireo, aproveitamento=1.0, aneis=1):
+    if categoria == "WIRE-O":
+        # WIRE-O: preço por caixa → anéis por caixa → anéis por produto
+        quantidade_por_caixa = mapeamento_wireo.get(selecionado, 6000)
+        preco_por_anel = preco_unitario / quantidade_por_caixa
+        return preco_por_anel * aneis
+    return preco_unitario * aproveitamento
+
+
+def _comparar(obtido, esperado):
+    esperado = np.array([np.nan if e is None else e for e in esperado], dtype=float)
+    np.testing.assert_allclose(np.asarray(obtido, dtype=float), esperado, rtol=1e-12, equal_nan=True)
+
+
+# ================== TESTES ==================
+@pytest.mark.parametrize('tipo', list(TABELAS))
+@pytest.mark.parametrize('quantidade', [1, 7, 15000])
+def test_componente_igual_a_calcular_custo(tipo, quantidade, modelo_repositorio, df_compras):
+    df_item = _tabela(tipo)
+    nomes = modelo_repositorio.motor_custos.opcoes(tipo)
+    resultado = modelo_repositorio.motor_custos.orcar(pd.DataFrame({'quantidade': quantidade, tipo: nomes}))
+    esperado = [calcular_custo_original(nome, df_item, tipo, df_compras, quantidade) for nome in nomes]
+    _comparar(resultado[f'{tipo}_custo'], esperado)
+    _comparar(resultado['total'], [0.0 if e is None else e for e in esperado])
+    assert resultado['incompleto'].tolist() == [e is None for e in esperado]
+
+
+def test_quantidade_aprovada_nao_positiva_conta_como_um(modelo_repositorio, df_compras):
+    df_item = _tabela('Miolo')
+    df_item['QuantidadeAprovada'] = np.resize([0, -5, 3], len(df_item)).astype('int16')
+    motor = MotorCustos({'Miolo': df_item}, modelo_repositorio.indice_precos.precos_de)
+    nomes = motor.opcoes('Miolo')
+    resultado = motor.orcar(pd.DataFrame({'quantidade': 500, 'Miolo': nomes}))
+    _comparar(resultado['Miolo_custo'],
+              [calcular_custo_original(nome, df_item, 'Miolo', df_compras, 500) for nome in nomes])
+
+
+@pytest.mark.parametrize('aproveitamento', [-1.0, 0.0, 0.3, 5.0])
+def test_personalizado_igual_a_calcular_personalizado(aproveitamento, modelo_repositorio, df_compras):
+    papeis = list(modelo_repositorio.papeis_unicos) + ['Papel Inexistente']
+    configs = pd.DataFrame({'quantidade': 15000, 'Bolsa': PERSONALIZADO, 'Bolsa_papel': papeis,
+                            'Bolsa_aproveitamento': aproveitamento, 'Bolsa_valor_servico': 2425.0})
+    resultado = modelo_repositorio.motor_custos.orcar(configs)
+    _comparar(resultado['Bolsa_custo'],
+              [calcular_personalizado_original(papel, aproveitamento, 2425.0, 15000, df_compras) for papel in papeis])
+    assert resultado['incompleto'].tolist() == [False] * (len(papeis) - 1) + [True]
+
+
+def test_compras_diretas_e_conversao_do_wireo(modelo_repositorio):
+    catalogo = modelo_repositorio.catalogo_cd
+    mapeamento = mapear_wireo(_ler('tabelawireo.csv', dados.ler_wireo))
+    for categoria in catalogo.categorias():
+        nomes = list(catalogo.itens(categoria))
+        coluna = f'{PREFIXO_CD}{categoria}'
+        configs = pd.DataFrame({'quantidade': 15000, coluna: nomes, f'{coluna}_aproveitamento': 0.3,
+                                f'{coluna}_aneis': 3})
+        resultado = modelo_repositorio.motor_custos.orcar(configs)
+        esperado = [custo_cd_original(categoria, nome, catalogo.item(categoria, nome).preco, mapeamento, 0.3, 3)
+                    for nome in nomes]
+        _comparar(resultado[f'{coluna}_custo'], esperado)
+
+    # Item fora da tabela de anéis: 6000 por caixa, como no app
+    assert QUANTIDADE_POR_CAIXA_PADRAO == 6000
+    nome = catalogo.itens(WIREO)[0]
+    sem_tabela = CatalogoCompraDireta(pd.DataFrame({
+        'CATEGORIA_MATERIAL_PCP': [WIREO], 'NomeLimpo': [nome], 'VALOR_UNITARIO': [120.0], 'DataEfetiva': [pd.NaT]}))
+    motor = MotorCustos({}, modelo_repositorio.indice_precos.precos_de, sem_tabela)
+    custo = motor.orcar([{'quantidade': 1, f'{PREFIXO_CD}{WIREO}': nome, f'{PREFIXO_CD}{WIREO}_aneis': 2}])
+    assert custo[f'{PREFIXO_CD}{WIREO}_custo'].iloc[0] == pytest.approx(custo_cd_original(WIREO, nome, 120.0, {}, aneis=2))
+
+
+def test_compra_direta_personalizada(modelo_repositorio):
+    coluna = f'{PREFIXO_CD}{modelo_repositorio.catalogo_cd.categorias()[0]}'
+    resultado = modelo_repositorio.motor_custos.orcar([{'quantidade': 10, coluna: PERSONALIZADO,
+                                                        f'{coluna}_valor_unitario': 2.5,
+                                                        f'{coluna}_aproveitamento': 0.3}])
+    assert resultado[f'{coluna}_custo'].iloc[0] == pytest.approx(2.5 * 0.3)
+
+
+def _config_sensibilidade(modelo):
+    motor = modelo.motor_custos
+    categoria = motor.catalogo.categorias()[0]
+    return {'quantidade': 1, 'Miolo': motor.opcoes('Miolo')[0], 'Bolsa': PERSONALIZADO,
+            'Bolsa_papel': modelo.papeis_unicos[0], 'Bolsa_aproveitamento': 1.0, 'Bolsa_valor_servico': 2425.0,
+            f'{PREFIXO_CD}{categoria}': motor.catalogo.itens(categoria)[0]}
+
+
+@pytest.mark.parametrize('precos_papel', [None, lambda papeis: np.full(len(papeis), 3.5)])
+def test_sensibilidade_igual_a_um_orcar_por_ponto(precos_papel, modelo_repositorio):
+    motor = modelo_repositorio.motor_custos
+    config = _config_sensibilidade(modelo_repositorio)
+    quantidades, aproveitamentos = [100, 1000, 15000], [0.5, 2.0]
+    grade = motor.sensibilidade(config, quantidades, aproveitamentos, 'Bolsa_aproveitamento', precos_papel)
+
+    # Quantidade por fora, aproveitamento por dentro
+    assert len(grade) == len(quantidades) * len(aproveitamentos)
+    assert list(grade.columns[:2]) == ['quantidade', 'aproveitamento']
+    assert grade['quantidade'].tolist() == [100, 100, 1000, 1000, 15000, 15000]
+    assert grade['aproveitamento'].tolist() == [0.5, 2.0] * 3
+    for _, ponto in grade.iterrows():
+        sozinho = motor.orcar([{**config, 'quantidade': ponto['quantidade'],
+                                'Bolsa_aproveitamento': ponto['aproveitamento']}], precos_papel)
+        pd.testing.assert_series_equal(ponto.drop(['quantidade', 'aproveitamento']), sozinho.iloc[0],
+                                       check_names=False)
+
+
+def test_sensibilidade_so_de_quantidades(modelo_repositorio):
+    motor = modelo_repositorio.motor_custos
+    config = _config_sensibilidade(modelo_repositorio)
+    grade = motor.sensibilidade(config, [10, 20, 30])
+    assert grade['quantidade'].tolist() == [10, 20, 30]
+    assert 'aproveitamento' not in grade
+    esperado = motor.orcar([{**config, 'quantidade': q} for q in (10, 20, 30)])
+    pd.testing.assert_frame_equal(grade.drop(columns='quantidade'), esperado)
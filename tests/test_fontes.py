@@ -0,0 +1,217 @@
+import dataclasses
+import hashlib
+import functools
+import os
+import shutil
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dados
+from conftest import RAIZ
+from fontes import FONTES, CarregadorFontes
+from snapshot import Snapshot
+
+# ================== SERVIDOR LOCAL NO LUGAR DO GITHUB ==================
+# Os CSVs do repositório servidos por um ThreadingHTTPServer numa porta livre; o
+# http.server responde If-Modified-Since com 304, como o raw.githubusercontent.
+
+
+class _Silencioso(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servidor(tmp_path):
+    """(base_url, pasta servida): cópia dos CSVs do repositório, que o teste pode alterar."""
+    for fonte in FONTES:
+        shutil.copy(os.path.join(RAIZ, fonte.arquivo), tmp_path)
+    http = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(_Silencioso, directory=str(tmp_path)))
+    thread = threading.Thread(target=http.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{http.server_address[1]}", tmp_path
+    http.shutdown()
+    http.server_close()
+
+
+def _sempre_vencidas():
+    # TTL zero: toda chamada a carregar() revalida todas as fontes no servidor
+    return [dataclasses.replace(fonte, ttl=0) for fonte in FONTES]
+
+
+def test_carrega_todas_as_fontes(servidor):
+    base_url, _ = servidor
+    carregador = CarregadorFontes(base_url=base_url)
+    valores, erros, versoes = carregador.carregar()
+    assert erros == {}
+    assert set(valores) == {fonte.nome for fonte in FONTES}
+    assert carregador.estatisticas['downloads'] == len(FONTES)
+    assert set(versoes) == set(valores)
+
+
+def test_fresca_dentro_do_ttl_e_revalidada_depois(servidor):
+    base_url, _ = servidor
+    carregador = CarregadorFontes(base_url=base_url)
+    valores, _, _ = carregador.carregar()
+    de_novo, _, _ = carregador.carregar()
+    assert carregador.estatisticas['hits'] == len(FONTES)
+    assert all(de_novo[nome] is valores[nome] for nome in valores)
+
+    carregador = CarregadorFontes(_sempre_vencidas(), base_url=base_url)
+    valores, _, _ = carregador.carregar()
+    revalidados, erros, _ = carregador.carregar()
+    assert erros == {}
+    # Arquivos intocados: o If-Modified-Since vira 304 e nada é baixado nem parseado de novo
+    assert carregador.estatisticas['nao_modificados'] == len(FONTES)
+    assert carregador.estatisticas['downloads'] == len(FONTES)
+    assert all(revalidados[nome] is valores[nome] for nome in valores)
+
+
+def test_mesmo_conteudo_com_data_nova_reaproveita_o_valor(servidor):
+    base_url, pasta = servidor
+    carregador = CarregadorFontes(_sempre_vencidas(), base_url=base_url)
+    valores, _, _ = carregador.carregar()
+    caminho = pasta / 'usodepapelmiolos.csv'
+    os.utime(caminho, (caminho.stat().st_atime, caminho.stat().st_mtime + 5))
+
+    novos, _, _ = carregador.carregar()
+    # Baixado de novo (Last-Modified mudou), mas o hash é o mesmo: não é re-parseado
+    assert carregador.estatisticas['downloads'] == len(FONTES) + 1
+    assert novos['miolos'] is valores['miolos']
+
+
+def test_fonte_com_404_mantem_o_ultimo_valor_bom(servidor):
+    base_url, pasta = servidor
+    carregador = CarregadorFontes(_sempre_vencidas(), base_url=base_url)
+    valores, _, versoes = carregador.carregar()
+    os.remove(pasta / 'tabelawireo.csv')
+
+    novos, erros, novas_versoes = carregador.carregar()
+    assert erros == {}
+    assert novos['wireo'] is valores['wireo']
+    assert novas_versoes == versoes
+    assert carregador.estatisticas['falhas'] == 1
+    assert set(novos) == set(valores)
+
+
+def test_fonte_com_404_sem_valor_anterior_vira_erro(servidor):
+    base_url, pasta = servidor
+    os.remove(pasta / 'tabelawireo.csv')
+    valores, erros, versoes = CarregadorFontes(base_url=base_url).carregar()
+    assert set(erros) == {'wireo'}
+    assert set(valores) == set(versoes) == {fonte.nome for fonte in FONTES} - {'wireo'}
+
+
+# ================== INGESTÃO INCREMENTAL ==================
+def _anexar(caminho, linhas):
+    with open(caminho, 'ab') as f:
+        f.write(linhas)
+    # http.server compara Last-Modified com resolução de segundos
+    os.utime(caminho, (caminho.stat().st_atime, caminho.stat().st_mtime + 5))
+
+
+def _ultimas_linhas(caminho, n):
+    conteudo = caminho.read_bytes()
+    return b''.join(conteudo.splitlines(keepends=True)[-n:])
+
+
+def test_anexo_nas_compras_e_lido_de_forma_incremental(servidor):
+    base_url, pasta = servidor
+    caminho = pasta / 'compradepapel.csv'
+    carregador = CarregadorFontes(_sempre_vencidas(), base_url=base_url)
+    carregador.carregar()
+    _anexar(caminho, _ultimas_linhas(caminho, 20))
+
+    valores, erros, versoes = carregador.carregar()
+    assert erros == {}
+    assert carregador.estatisticas['incrementais'] == 1
+    # A versão devolvida é a do conteúdo que gerou o valor devolvido
+    assert versoes['compras'] == hashlib.sha256(caminho.read_bytes()).hexdigest()
+    completo = dados.ler_compras(caminho.read_bytes())
+    pd.testing.assert_frame_equal(valores['compras'][0].reset_index(drop=True), completo.reset_index(drop=True))
+    _, papeis, indice, motor = dados.derivar_compras(completo)
+    assert valores['compras'][1] == papeis
+    # Índice e motor vêm do valor anterior mais as linhas anexadas
+    np.testing.assert_array_equal(valores['compras'][2].precos_de(papeis), indice.precos_de(papeis))
+    np.testing.assert_array_equal(valores['compras'][3].precos(papeis), motor.precos(papeis))
+
+
+def test_edicao_no_meio_do_arquivo_cai_na_leitura_completa(servidor):
+    base_url, pasta = servidor
+    caminho = pasta / 'compradepapel.csv'
+    carregador = CarregadorFontes(_sempre_vencidas(), base_url=base_url)
+    carregador.carregar()
+    linhas = caminho.read_bytes().splitlines(keepends=True)
+    caminho.write_bytes(b''.join(linhas[:1] + linhas[2:] + linhas[1:2]))
+    os.utime(caminho, (caminho.stat().st_atime, caminho.stat().st_mtime + 5))
+
+    valores, _, _ = carregador.carregar()
+    assert carregador.estatisticas['incrementais'] == 0
+    completo = dados.ler_compras(caminho.read_bytes())
+    pd.testing.assert_frame_equal(valores['compras'][0].reset_index(drop=True), completo.reset_index(drop=True))
+
+
+# ================== COLD START PELO SNAPSHOT ==================
+# Sem servidor: a porta 9 (discard) recusa a conexão, então qualquer requisição viraria falha
+SEM_REDE = "http://127.0.0.1:9"
+
+
+def _com_snapshot(servidor, tmp_path):
+    base_url, _ = servidor
+    snapshot = Snapshot(str(tmp_path / '.snapshot'))
+    valores, erros, versoes = CarregadorFontes(base_url=base_url, snapshot=snapshot).carregar()
+    assert erros == {}
+    return snapshot, valores, versoes
+
+
+def test_snapshot_dentro_do_ttl_e_servido_sem_rede(servidor, tmp_path):
+    snapshot, valores, versoes = _com_snapshot(servidor, tmp_path)
+
+    carregador = CarregadorFontes(base_url=SEM_REDE, snapshot=snapshot)
+    semeados, erros, versoes_semeadas = carregador.carregar()
+    assert erros == {}
+    assert versoes_semeadas == versoes
+    assert carregador.estatisticas['snapshot'] == carregador.estatisticas['hits'] == len(FONTES)
+    assert carregador.estatisticas['downloads'] == carregador.estatisticas['falhas'] == 0
+    pd.testing.assert_frame_equal(semeados['compras'][0], valores['compras'][0])
+
+
+def test_snapshot_vencido_e_revalidado_no_servidor(servidor, tmp_path):
+    snapshot, _, versoes = _com_snapshot(servidor, tmp_path)
+    base_url, pasta = servidor
+    _anexar(pasta / 'usodepapelmiolos.csv', _ultimas_linhas(pasta / 'usodepapelmiolos.csv', 1))
+
+    carregador = CarregadorFontes(_sempre_vencidas(), base_url=base_url, snapshot=snapshot)
+    _, erros, novas_versoes = carregador.carregar()
+    assert erros == {}
+    # Só a fonte alterada é baixada; as outras voltam 304 pelo Last-Modified do manifesto
+    assert carregador.estatisticas['nao_modificados'] == len(FONTES) - 1
+    assert carregador.estatisticas['downloads'] == 1
+    assert novas_versoes['miolos'] == hashlib.sha256((pasta / 'usodepapelmiolos.csv').read_bytes()).hexdigest()
+    assert {n: v for n, v in novas_versoes.items() if n != 'miolos'} == \
+        {n: v for n, v in versoes.items() if n != 'miolos'}
+
+
+def test_anexo_depois_de_reiniciar_e_incremental_pelo_snapshot(servidor, tmp_path):
+    snapshot, _, _ = _com_snapshot(servidor, tmp_path)
+    base_url, pasta = servidor
+    caminho = pasta / 'compradepapel.csv'
+    _anexar(caminho, _ultimas_linhas(caminho, 20))
+
+    # Processo novo: o tamanho e o hash do prefixo vêm do manifesto do snapshot
+    carregador = CarregadorFontes(_sempre_vencidas(), base_url=base_url, snapshot=snapshot)
+    valores, erros, versoes = carregador.carregar()
+    assert erros == {}
+    assert carregador.estatisticas['incrementais'] == 1
+    completo = dados.ler_compras(caminho.read_bytes())
+    pd.testing.assert_frame_equal(valores['compras'][0].reset_index(drop=True), completo.reset_index(drop=True))
+
+    # E o snapshot foi regravado com o conteúdo novo
+    df, meta = Snapshot(str(tmp_path / '.snapshot')).carregar('compras')
+    assert meta['hash'] == versoes['compras']
+    assert meta['tamanho'] == len(caminho.read_bytes())
+    pd.testing.assert_frame_equal(df.reset_index(drop=True), completo.reset_index(drop=True))
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+import instrumentacao
+from instrumentacao import Registro
+
+
+class _Relogio:
+    """perf_counter que avança só quando o teste manda."""
+
+    def __init__(self):
+        self.agora = 100.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    relogio = _Relogio()
+    monkeypatch.setattr(instrumentacao.time, 'perf_counter', relogio)
+    return relogio
+
+
+def test_etapas_e_contadores(relogio):
+    registro = Registro(ativo=True)
+    for duracao in (0.5, 2.0, 1.0):
+        with registro.etapa('compras.read_csv'):
+            relogio.agora += duracao
+    registro.contar('cache.hits')
+    registro.contar('cache.hits', 2)
+
+    dados = registro.dados()
+    assert dados['etapas']['compras.read_csv'] == {'execucoes': 3, 'total_s': 3.5, 'max_s': 2.0, 'ultima_s': 1.0}
+    assert dados['contadores'] == {'cache.hits': 3}
+    assert json.loads(registro.exportar_json())['contadores'] == {'cache.hits': 3}
+
+
+def test_exportacao_prometheus(relogio):
+    registro = Registro(ativo=True)
+
+    @registro.cronometrar('modelo.montar')
+    def montar():
+        relogio.agora += 0.25
+
+    montar()
+    montar()
+    registro.contar('rótulo "com" aspas\\barra\nquebra')
+
+    linhas = registro.exportar_prometheus().splitlines()
+    assert '# TYPE orcamento_etapa_execucoes_total counter' in linhas
+    assert 'orcamento_etapa_execucoes_total{etapa="modelo.montar"} 2' in linhas
+    assert 'orcamento_etapa_segundos_total{etapa="modelo.montar"} 0.5' in linhas
+    assert '# TYPE orcamento_etapa_segundos_max gauge' in linhas
+    assert 'orcamento_etapa_segundos_max{etapa="modelo.montar"} 0.25' in linhas
+    # Aspas, barra invertida e quebra de linha escapadas como o formato texto exige
+    assert 'orcamento_contador_total{nome="rótulo \\"com\\" aspas\\\\barra\\nquebra"} 1' in linhas
+    assert registro.exportar_prometheus(prefixo='app').startswith('# HELP app_etapa_execucoes_total ')
+
+
+def test_secoes_fecham_o_trecho_anterior(relogio):
+    registro = Registro(ativo=True)
+    secoes = registro.secoes('rerun')
+    relogio.agora += 1.0        # antes da primeira marca: só entra no total
+    secoes.marcar('dados')
+    relogio.agora += 2.0
+    secoes.marcar('formulario')
+    relogio.agora += 0.5
+    secoes.encerrar()
+
+    etapas = registro.dados()['etapas']
+    assert {nome: e['total_s'] for nome, e in etapas.items()} == {
+        'rerun.dados': 2.0, 'rerun.formulario': 0.5, 'rerun.total': 3.5}
+
+
+def test_desligado_nao_registra_nada(relogio):
+    registro = Registro()
+    assert registro.etapa('a') is registro.etapa('b')
+    with registro.etapa('a'):
+        relogio.agora += 1.0
+    registro.contar('cache.hits')
+    registro.cronometrar('c')(lambda: None)()
+    secoes = registro.secoes('rerun')
+    secoes.marcar('dados')
+    secoes.encerrar()
+
+    assert registro.dados()['etapas'] == registro.dados()['contadores'] == {}
+    assert registro.exportar_prometheus().count('\n') == 8  # só HELP e TYPE das quatro métricas
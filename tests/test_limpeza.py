@@ -0,0 +1,96 @@
+import os
+import re
+
+import pandas as pd
+import pytest
+
+import limpeza
+from conftest import RAIZ
+
+# ================== REFERÊNCIA: REGRAS DE LIMPEZA, LINHA A LINHA ==================
+# As regras escritas com `.apply` e `re.sub`, como o app fazia antes da vetorização;
+# a versão vetorizada (com memo por nome distinto) tem que dar exatamente o mesmo
+# resultado. O nome do papel segue a regra original; o da compra direta, a regra
+# atual do sufixo UNICA (a antiga fica só para comparar as duas).
+
+
+def limpar_papel_original(nome):
+    if pd.isna(nome):
+        return ""
+    nome = re.sub(r'^(MP\d{3}|COUCHE|CARTAO|PAPEL|20\d{3}|COLOR|SCRITURA|Papel|Cartão)\s*', '', str(nome), flags=re.IGNORECASE)
+    nome = re.sub(r'\s*UNICA-\w+', '', nome)
+    nome = re.sub(r'\s*-\s*SEM\s*LINER', '', nome, flags=re.IGNORECASE)
+    nome = re.sub(r'\s*-\s*CHAMBRIL', '', nome, flags=re.IGNORECASE)
+    nome = re.sub(r'\s+', ' ', nome).strip()
+    return nome.title()
+
+
+def nome_limpo_linha_a_linha(demanda):
+    nome_limpo = demanda.apply(lambda x: re.sub(r'^MP\d{3}\s*', '', str(x)))
+    # Só a etiqueta genérica "UNICA-U" sai; a bitola fica ("…PRETAUNICA-7/8" →
+    # "…PRETA 7/8"), como na tabela de anéis de WIRE-O
+    nome_limpo = nome_limpo.apply(lambda x: re.sub(r'\s*UNICA-(?:U\b)?', ' ', str(x)))
+    return nome_limpo.str.strip()
+
+
+def nome_limpo_regra_antiga(demanda):
+    # A regra original do app: cortava o sufixo inteiro, bitola junto (pela metade em "7/8")
+    nome_limpo = demanda.apply(lambda x: re.sub(r'^MP\d{3}\s*', '', str(x)))
+    nome_limpo = nome_limpo.apply(lambda x: re.sub(r'\s*UNICA-[A-Z0-9\-]+', '', str(x)))
+    return nome_limpo.str.strip()
+
+
+def _coluna(arquivo, coluna):
+    return pd.read_csv(os.path.join(RAIZ, arquivo), encoding='utf-8').iloc[:, coluna]
+
+
+NOMES_DE_PAPEL = [
+    ('compradepapel.csv', 0),  # Demanda
+    ('usodepapelmiolos.csv', 1),  # Papel
+    ('usodepapelbolsa.csv', 1),
+    ('usodepapeldivisoria.csv', 1),
+    ('usodepapeladesivo.csv', 1),
+]
+
+
+@pytest.mark.parametrize('arquivo, coluna', NOMES_DE_PAPEL)
+def test_limpar_papeis_igual_a_limpeza_original(arquivo, coluna):
+    nomes = _coluna(arquivo, coluna)
+    esperado = nomes.apply(limpar_papel_original)
+    # Duas vezes: a segunda chamada sai inteira do memo
+    for _ in range(2):
+        assert limpeza.limpar_papeis(nomes).tolist() == esperado.tolist()
+    assert nomes.apply(limpeza.limpar_papel).tolist() == esperado.tolist()
+
+
+def _demandas_cd():
+    return pd.read_csv(os.path.join(RAIZ, 'compradiretav2.csv'), encoding='utf-8')['DEMANDA']
+
+
+def test_limpar_nomes_cd_igual_a_regra_linha_a_linha():
+    demanda = _demandas_cd()
+    esperado = nome_limpo_linha_a_linha(demanda)
+    for _ in range(2):
+        assert limpeza.limpar_nomes_cd(demanda).tolist() == esperado.tolist()
+    assert demanda.apply(limpeza.limpar_nome_cd).tolist() == esperado.tolist()
+
+
+def test_regra_antiga_e_atual_so_diferem_nos_sufixos_com_bitola():
+    demanda = _demandas_cd()
+    com_bitola = demanda.str.contains(r'UNICA-(?!U\b)', regex=True)
+    assert com_bitola.any() and demanda.str.contains('UNICA-U', regex=False).any()
+    diferentes = nome_limpo_regra_antiga(demanda) != nome_limpo_linha_a_linha(demanda)
+    assert diferentes.tolist() == com_bitola.tolist()
+
+
+def test_limpar_nomes_cd_mantem_a_bitola_do_wireo():
+    nomes = pd.Series(['MP001 WIRE-O PRETAUNICA-7/8', 'MP001 WIRE-O PRETAUNICA-5/8', 'MP002 ELASTICO 3MMUNICA-U'])
+    assert limpeza.limpar_nomes_cd(nomes).tolist() == ['WIRE-O PRETA 7/8', 'WIRE-O PRETA 5/8', 'ELASTICO 3MM']
+
+
+def test_limpeza_preserva_indice_e_ausentes():
+    nomes = pd.Series(['MP001 COUCHE 90G', None, 'MP001 COUCHE 90G'], index=[10, 20, 30], name='Demanda')
+    limpos = limpeza.limpar_papeis(nomes)
+    assert limpos.index.tolist() == [10, 20, 30]
+    assert limpos.name == 'Demanda'
+    assert limpos.tolist() == [limpar_papel_original(n) for n in nomes]
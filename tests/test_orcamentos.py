@@ -0,0 +1,94 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from custos import PERSONALIZADO, PREFIXO_CD
+from orcamentos import ABERTO, ArmazemOrcamentos
+from precos import MEDIA_PONDERADA, ULTIMO, funcoes_de_preco
+
+
+@pytest.fixture
+def armazem(tmp_path):
+    armazem = ArmazemOrcamentos(str(tmp_path / 'orcamentos.sqlite3'))
+    yield armazem
+    armazem.fechar()
+
+
+def _config(modelo, quantidade=15000):
+    motor = modelo.motor_custos
+    categoria = motor.catalogo.categorias()[0]
+    return {'quantidade': quantidade, 'Miolo': motor.opcoes('Miolo')[0],
+            'Bolsa': PERSONALIZADO, 'Bolsa_papel': modelo.papeis_unicos[0],
+            'Bolsa_aproveitamento': 4.0, 'Bolsa_valor_servico': 2425.0,
+            f'{PREFIXO_CD}{categoria}': motor.catalogo.itens(categoria)[0]}
+
+
+def test_salvar_e_carregar_preserva_a_configuracao(armazem, modelo_repositorio):
+    config = _config(modelo_repositorio)
+    config['Bolsa_aproveitamento'] = np.float64(4.0)  # valores vindos do motor/pandas
+    base = (MEDIA_PONDERADA, date(2024, 1, 31), True)
+    id_salvo = armazem.salvar("Caderno", config, base, np.float64(12.5), {'compras': 'abc'})
+
+    # Ids lidos de um DataFrame são numpy.int64
+    salvo = armazem.carregar(np.int64(id_salvo))
+    assert salvo is not None
+    assert (salvo.nome, salvo.status, salvo.total, salvo.incompleto) == ("Caderno", ABERTO, 12.5, False)
+    assert salvo.config == {chave: float(v) if isinstance(v, np.floating) else v for chave, v in config.items()}
+    assert salvo.base_preco == (MEDIA_PONDERADA, '2024-01-31', True)
+    assert armazem.carregar(id_salvo + 1) is None
+
+
+def test_listar_filtra_por_status(armazem, modelo_repositorio):
+    config = _config(modelo_repositorio)
+    ids = [armazem.salvar(f"Orçamento {i}", config, total=1.0) for i in range(3)]
+    lista = armazem.listar()
+    armazem.alterar_status(lista['id'].iloc[0], 'fechado')
+    armazem.excluir(lista['id'].iloc[1])
+
+    assert armazem.listar()['id'].tolist() == [ids[2], ids[0]]
+    assert armazem.listar(status=ABERTO)['id'].tolist() == [ids[0]]
+    assert armazem.listar(status='fechado')['id'].tolist() == [ids[2]]
+
+
+def test_reprecificar_agrupa_por_base_de_preco(armazem, modelo_repositorio, monkeypatch):
+    motor = modelo_repositorio.motor_custos
+    bases = [None, (ULTIMO, None, False), (MEDIA_PONDERADA, '2024-01-31', False), (ULTIMO, None, True)]
+    ids = [armazem.salvar(f"Orçamento {i}", _config(modelo_repositorio, 1000 * (i + 1)), base, total=1.0)
+           for i, base in enumerate(bases)]
+    fechado = armazem.salvar("Fechado", _config(modelo_repositorio), total=1.0)
+    armazem.alterar_status(fechado, 'fechado')
+
+    chamadas = []
+    orcar = motor.orcar
+    monkeypatch.setattr(motor, 'orcar', lambda configs, *args: chamadas.append(len(configs)) or orcar(configs, *args))
+    relatorio = armazem.reprecificar(modelo_repositorio).set_index('id')
+
+    # Sem base e a última compra sem custo posto caem no mesmo grupo; a data salva não conta
+    assert sorted(chamadas) == [1, 1, 2]
+    assert sorted(relatorio.index) == ids
+    for id_salvo, base in zip(ids, bases):
+        metodo, _, custo_posto = base or (ULTIMO, None, False)
+        esperado = orcar([_config(modelo_repositorio, 1000 * (ids.index(id_salvo) + 1))],
+                         *funcoes_de_preco(modelo_repositorio.motor_papel, modelo_repositorio.motor_cd,
+                                           metodo, None, custo_posto))['total'].iloc[0]
+        assert relatorio.at[id_salvo, 'total_atual'] == pytest.approx(esperado)
+        assert relatorio.at[id_salvo, 'delta'] == pytest.approx(esperado - 1.0)
+    assert armazem.listar(status=ABERTO).set_index('id')['total_atual'].to_dict() == pytest.approx(
+        relatorio['total_atual'].to_dict())
+    assert armazem.listar(status='fechado')['total_atual'].iloc[0] is None
+
+
+def test_orcamento_incompleto_fica_sem_delta(armazem, modelo_repositorio):
+    completo = armazem.salvar("Completo", _config(modelo_repositorio), total=0.01)
+    # Salvo com um componente sem preço: o total deixou esse componente de fora
+    incompleto = armazem.salvar("Incompleto", _config(modelo_repositorio), total=0.01, incompleto=True)
+    sem_preco = armazem.salvar("Sem preço", {**_config(modelo_repositorio), 'Bolsa_papel': 'Papel Inexistente'},
+                               total=0.01)
+
+    assert armazem.carregar(incompleto).incompleto
+    relatorio = armazem.reprecificar(modelo_repositorio, gravar=False).set_index('id')
+    assert relatorio['incompleto'].to_dict() == {completo: False, incompleto: True, sem_preco: True}
+    assert relatorio.at[completo, 'delta'] > 0
+    assert relatorio.loc[[incompleto, sem_preco], 'delta'].isna().all()
+    assert int((relatorio['delta'] > 0).sum()) == 1
@@ -0,0 +1,76 @@
+import functools
+import io
+import pathlib
+
+import pandas as pd
+import pytest
+
+import orcar_lote
+from conftest import RAIZ
+from custos import PERSONALIZADO, PREFIXO_CD
+from snapshot import Snapshot
+
+
+@pytest.fixture
+def orcar(tmp_path, monkeypatch):
+    """orcar_arquivo sobre os CSVs do repositório (file://), com o snapshot em tmp_path."""
+    monkeypatch.setattr(orcar_lote, 'Snapshot', functools.partial(Snapshot, str(tmp_path / 'snapshot')))
+
+    def executar(entrada, processos, **kwargs):
+        saida = tmp_path / f'saida-{processos}.csv'
+        linhas = orcar_lote.orcar_arquivo(str(entrada), str(saida), processos, bloco=2,
+                                          base_url=pathlib.Path(RAIZ).as_uri(), **kwargs)
+        return linhas, saida.read_text(encoding='utf-8')
+    return executar
+
+
+@pytest.fixture
+def bom(tmp_path, modelo_repositorio):
+    motor = modelo_repositorio.motor_custos
+    miolos = motor.opcoes('Miolo')
+    categoria = motor.catalogo.categorias()[0]
+    coluna = f'{PREFIXO_CD}{categoria}'
+    df = pd.DataFrame({
+        'quantidade': [1000, 2000, 3000, 4000, 5000],
+        'Miolo': [miolos[0], PERSONALIZADO, None, miolos[1], miolos[2]],
+        'Miolo_papel': [None, modelo_repositorio.papeis_unicos[0], None, None, None],
+        'Miolo_aproveitamento': [None, 4, None, None, None],
+        'Miolo_valor_servico': [None, 1500, None, None, None],
+        coluna: [None, None, motor.catalogo.itens(categoria)[0], None, None],
+    })
+    caminho = tmp_path / 'boms.csv'
+    df.to_csv(caminho, index=False)
+    return caminho, df
+
+
+def test_um_e_dois_processos_dao_a_mesma_saida(orcar, bom, modelo_repositorio):
+    caminho, df = bom
+    linhas_1, saida_1 = orcar(caminho, 1)
+    linhas_2, saida_2 = orcar(caminho, 2)
+    assert linhas_1 == linhas_2 == len(df)
+    assert saida_1 == saida_2
+
+    # Cabeçalho uma vez e as linhas na ordem de entrada, com as colunas de entrada ecoadas
+    assert saida_1.count('quantidade,') == 1
+    resultado = pd.read_csv(io.StringIO(saida_1), dtype=str)
+    entrada = pd.read_csv(caminho, dtype=str)
+    pd.testing.assert_frame_equal(resultado[entrada.columns], entrada)
+    esperado = modelo_repositorio.motor_custos.orcar(df)['total']
+    pd.testing.assert_series_equal(resultado['total'].astype(float), esperado, check_names=False)
+
+
+def test_erro_no_processo_do_pool_chega_ao_chamador(orcar, bom):
+    caminho, _ = bom
+    with pytest.raises(ValueError, match="Método de preço desconhecido"):
+        orcar(caminho, 2, metodo='invalido')
+
+
+@pytest.mark.parametrize('conteudo', ['quantidade,Miolo\n', ''])
+def test_entrada_sem_linhas_grava_o_cabecalho(orcar, tmp_path, conteudo):
+    caminho = tmp_path / 'vazio.csv'
+    caminho.write_text(conteudo, encoding='utf-8')
+    for processos in (1, 2):
+        linhas, saida = orcar(caminho, processos)
+        assert linhas == 0
+        assert saida.splitlines()[0].startswith(conteudo.strip() or 'total')
+        assert len(saida.splitlines()) == 1
@@ -0,0 +1,105 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import dados
+from conftest import RAIZ
+from precos import MEDIA_PONDERADA, ULTIMO, MotorPrecos
+
+
+def _compras(conteudo):
+    df = dados.ler_compras(conteudo)
+    _, papeis, indice, motor = dados.derivar_compras(df)
+    return papeis, indice, motor
+
+
+def test_indice_e_motor_concordam_no_ultimo_preco():
+    with open(os.path.join(RAIZ, 'compradepapel.csv'), 'rb') as f:
+        papeis, indice, motor = _compras(f.read())
+    # "Última compra" sem data (índice) = com a data de hoje (motor)
+    esperado = indice.precos_de(papeis)
+    np.testing.assert_array_equal(motor.precos(papeis), esperado)
+    np.testing.assert_array_equal(motor.precos(papeis, pd.Timestamp.today()), esperado)
+
+
+def test_empate_no_mesmo_dia_fica_com_a_linha_mais_abaixo():
+    with open(os.path.join(RAIZ, 'compradepapel.csv'), 'rb') as f:
+        linhas = f.read().splitlines(keepends=True)
+    cabecalho, primeira = linhas[0], linhas[1].decode('utf-8')
+    # Duas compras do mesmo papel no mesmo dia (e sem NF na segunda: vale a aprovação)
+    campos = primeira.rstrip('\r\n').split(',')
+    colunas = cabecalho.decode('utf-8').rstrip('\r\n').split(',')
+    valor, nf = colunas.index('VALOR_UNITARIO'), colunas.index('DATA_EMISSAO_NF')
+    aprovacao = colunas.index('DATA_APROVAÇÃO')
+    campos[valor], campos[nf], campos[aprovacao] = '1.0', '10/01/2030', '01/01/2030'
+    antes = ','.join(campos)
+    campos[valor], campos[nf], campos[aprovacao] = '2.0', '', '10/01/2030'
+    depois = ','.join(campos)
+    conteudo = cabecalho + f'{antes}\n{depois}\n'.encode('utf-8')
+
+    papeis, indice, motor = _compras(conteudo)
+    assert indice.preco(papeis[0]) == 2.0
+    assert motor.precos(papeis)[0] == 2.0
+    assert indice.get(papeis[0]).data == pd.Timestamp('2030-01-10')
+
+
+def test_media_ponderada_com_janela_de_dias():
+    motor = MotorPrecos(['A', 'A', 'A', 'B'],
+                        pd.to_datetime(['2024-01-01', '2024-01-11', '2024-01-21', '2024-01-01']),
+                        [1.0, 2.0, 3.0, 5.0], [10, 10, 10, 10])
+    # Sem data, a janela termina na última compra de cada item
+    np.testing.assert_array_equal(motor.precos(['A', 'B', 'C'], None, MEDIA_PONDERADA, janela_dias=30),
+                                  [2.0, 5.0, np.nan])
+    assert motor.precos(['A'], None, MEDIA_PONDERADA, janela_dias=15)[0] == 2.5
+    # Com data, termina nela: só as compras dos 15 dias até 12/01
+    assert motor.precos(['A'], '2024-01-12', MEDIA_PONDERADA, janela_dias=15)[0] == 1.5
+    assert motor.precos(['A'], '2024-01-12', MEDIA_PONDERADA, janela_dias=5)[0] == 2.0
+    assert np.isnan(motor.precos(['A'], '2023-12-31', MEDIA_PONDERADA, janela_dias=30)[0])
+
+
+def _partes(arquivo, ler, corte):
+    """(anterior, anexo) lidos do CSV: o anexo tem compras de datas intercaladas no
+    histórico e linhas repetidas (empates de dia com o que já existe, a preço diferente)."""
+    with open(os.path.join(RAIZ, arquivo), 'rb') as f:
+        linhas = f.read().splitlines(keepends=True)
+    cabecalho, corpo = linhas[0], linhas[1:]
+    return ler(cabecalho + b''.join(corpo[:corte])), ler(cabecalho + b''.join(corpo[corte:] + corpo[:20]))
+
+
+def _mais_caras(df, coluna):
+    return df.assign(**{coluna: df[coluna] + 1.0})
+
+
+def _mesmos_precos(juntado, completo, itens):
+    for metodo in (ULTIMO, MEDIA_PONDERADA):
+        for data in (None, '2024-06-30', pd.Timestamp.today()):
+            for custo_posto in (False, True):
+                np.testing.assert_array_equal(juntado.precos(itens, data, metodo, custo_posto),
+                                              completo.precos(itens, data, metodo, custo_posto))
+    np.testing.assert_array_equal(juntado.precos(itens, None, MEDIA_PONDERADA, janela_dias=90),
+                                  completo.precos(itens, None, MEDIA_PONDERADA, janela_dias=90))
+
+
+def test_compras_anexadas_dao_o_mesmo_indice_e_motor_que_o_historico_inteiro():
+    df, novas = _partes('compradepapel.csv', dados.ler_compras, 200)
+    novas = _mais_caras(novas, 'ValorUnitario')
+    anterior = dados.derivar_compras(df)
+    df_juntado = dados.juntar_compras(df, novas)
+    _, papeis, indice, motor = dados.derivar_compras_anexadas(anterior, df_juntado, novas)
+    _, papeis_completo, indice_completo, motor_completo = dados.derivar_compras(df_juntado)
+
+    assert papeis == papeis_completo
+    assert {p: indice.get(p) for p in papeis} == {p: indice_completo.get(p) for p in papeis}
+    np.testing.assert_array_equal(indice.precos_de(papeis), indice_completo.precos_de(papeis))
+    _mesmos_precos(motor, motor_completo, papeis)
+
+
+def test_compras_diretas_anexadas_dao_o_mesmo_motor_que_o_historico_inteiro():
+    df_cd, novas = _partes('compradiretav2.csv', dados.ler_compras_diretas, 700)
+    novas = _mais_caras(novas, 'VALOR_UNITARIO')
+    anterior = dados.derivar_compras_diretas(df_cd)
+    df_juntado = dados.juntar_compras_diretas(df_cd, novas)
+    _, motor = dados.derivar_compras_diretas_anexadas(anterior, df_juntado, novas)
+    _, motor_completo = dados.derivar_compras_diretas(df_juntado)
+    _mesmos_precos(motor, motor_completo, list(motor_completo.itens) + ['INEXISTENTE'])
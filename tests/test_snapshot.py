@@ -0,0 +1,23 @@
+import pandas as pd
+
+import snapshot
+from snapshot import Snapshot
+
+
+def test_salvar_e_carregar(tmp_path):
+    df = pd.DataFrame({'Papel': pd.Categorical(['A', 'B', 'A']), 'Valor': [1.0, 2.5, 3.0]})
+    Snapshot(str(tmp_path)).salvar('compras', df, 'ab' * 32, etag='"x"', tamanho=10)
+
+    salvo, meta = Snapshot(str(tmp_path)).carregar('compras')
+    pd.testing.assert_frame_equal(salvo, df)
+    assert (meta['hash'], meta['etag'], meta['tamanho']) == ('ab' * 32, '"x"', 10)
+
+
+def test_salvar_apaga_snapshots_de_outras_versoes(tmp_path):
+    for antiga in range(1, snapshot.VERSAO):
+        (tmp_path / f'v{antiga}').mkdir()
+        (tmp_path / f'v{antiga}' / 'compras-0.arrow').write_bytes(b'')
+    (tmp_path / 'outra-pasta').mkdir()
+
+    Snapshot(str(tmp_path)).salvar('compras', pd.DataFrame({'Valor': [1.0]}), 'cd' * 32)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['outra-pasta', f'v{snapshot.VERSAO}']